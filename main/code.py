@@ -1,42 +1,96 @@
 print("Hello World!")
 import time
+import asyncio
 import board
 import displayio
 import terminalio
 import neopixel
+import vectorio
 import json
 import os
 from adafruit_display_text import label
 from fourwire import FourWire
 from adafruit_st7789 import ST7789
 from adafruit_seesaw.seesaw import Seesaw
-from adafruit_seesaw import rotaryio, digitalio
+import digitalio
+import microcontroller
 from adafruit_seesaw.neopixel import NeoPixel as SeesawNeoPixel
 from color_utils import *
+from render_utils import Renderer, ValueBar
+from input_utils import (EVENT_PRESS, EVENT_ROTATE, CountingI2C, EncoderInput, I2CBusManager,
+                         SimulatedEncoder, TraceRecorder, load_trace, replay_trace)
+from state_utils import FileStorage, StateStore
+from led_utils import GAMMA_TABLES, TRAIL_OFF, ChannelTrail, LEDFrameManager
+from menu_utils import ColorNameView, KnobChannel, dispatch_event, encoder_accelerator
 
 
 
-MAX_ENCODER_DELTA = 50
 SCREEN_WIDTH = 320
 SCREEN_HEIGHT = 172
-
-
-NEOPIXEL_REGISTRY = {}
+COLOR_NAME_CACHE_SIZE = 64
 
 
 # Load global settings
 with open('/settings.json', 'r') as f:
     SETTINGS = json.load(f)
 
-class SimulatedEncoder:
-    def __init__(self, initial_position=0):
-        self.position = initial_position
-
-class Channel:
+# Every NeoPixel strip by pin; dirty strips are shown once per main loop frame.
+# Dithering needs each strip shown at least 2 * min_fps times a second (1/16
+# level steps need 16 * min_fps); with four strips, refresh_budget 2 and a
+# 100 Hz trail task that is 50 shows/s, so raise refresh_budget or lower
+# min_fps to see it. It turns itself off when the rate isn't there.
+LED_DITHER = SETTINGS.get("led_dither", {})
+NEOPIXEL_REGISTRY = LEDFrameManager(
+    dither=LED_DITHER.get("enabled", False),
+    dither_budget=LED_DITHER.get("refresh_budget", 2),
+    dither_min_fps=LED_DITHER.get("min_fps", 60)
+)
+
+# Encoder boards are read when they pull the shared INT pin low, or every poll
+# interval. encoder_poll_interval null polls every loop without an INT pin and
+# every 0.5 s with one; set it only to override that pairing.
+encoder_int_line = None
+if SETTINGS.get("encoder_int_pin"):
+    encoder_int_line = digitalio.DigitalInOut(getattr(board, SETTINGS["encoder_int_pin"]))
+    encoder_int_line.switch_to_input(pull=digitalio.Pull.UP)
+ENCODER_INPUT = EncoderInput(
+    encoder_int_line,
+    SETTINGS.get("encoder_poll_interval"),
+    SETTINGS.get("encoder_read_delay", 0.008),
+    SETTINGS.get("button_timing", {})
+)
+
+# Knob acceleration curve and timing-based glitch rejection
+ENCODER_ACCELERATION = SETTINGS.get("encoder_acceleration", {})
+
+# Value steps per accelerated encoder step unless saved state has one
+DEFAULT_KNOB_SENSITIVITY = SETTINGS.get("knob_sensitivity", 3)
+
+# Seconds per trail step unless saved state has one. Steps are timed since
+# the trail animator, so 0.07 keeps the ~0.5 s long 8 pixel trail that the
+# old one-step-per-loop trail showed at a ~65 ms hardware loop.
+DEFAULT_TRAIL_DELAY = SETTINGS.get("trail_animation", {}).get("step", 0.07)
+
+# "rgb" names colors by squared RGB distance, "lab" by perceptual Delta E 2000
+set_naming_mode(SETTINGS.get("color_naming", NAMING_RGB))
+
+# The quantized name LUT answers first lookups faster for ~30 KB of heap;
+# NameTracker already makes the lookups of a turning knob cheap without it
+if SETTINGS.get("name_lut", False):
+    load_name_lut()
+
+# LED dim curves; call GAMMA_TABLES.configure() again to change them at runtime
+LED_GAMMA = SETTINGS.get("led_gamma", {})
+GAMMA_TABLES.configure(
+    trail_gamma=LED_GAMMA.get("trail", 0.5),
+    hue_gamma=LED_GAMMA.get("hue", 0.8),
+    floor=LED_GAMMA.get("floor", 1)
+)
+
+class Channel(KnobChannel):
     def __init__(self, config: dict, i2c, cursor_strip, color_index: int, saved_state: dict):
         """Initialize a single color channel linked to an encoder and NeoPixel bar."""
         self.color_index = color_index
-        self.encoder_address = int(config["encoder_addr"], 16)
         self.button_pin = config["button_pin"]
         self.neopixel_pin = config["neopixel_pin"]
         self.cursor_pixel_id = config["cursor_pixel_id"]
@@ -44,64 +98,61 @@ class Channel:
         self.cursor_strip = cursor_strip
 
         self.brightness = config.get("brightness", 0.4)
-        self.channel_enabled = saved_state.get("enabled", True)
-        self.value = saved_state.get("value", config.get("initial_value", 0))
-        self.pending_value = self.value
-        self.last_position = saved_state.get("encoder_position", 0)
-        self.last_trail_update = time.monotonic_ns()
-        self.button_pressed_at = time.monotonic_ns()
 
         # Trail LED setup
         if self.trail_pin not in NEOPIXEL_REGISTRY:
+            trail_order = config.get("trail_pixel_order", "RGB")
             trail_strip = neopixel.NeoPixel(
-                self.trail_pin, 8,
-                brightness=self.brightness,
+                self.trail_pin, config.get("trail_count", 8),
+                brightness=1.0,  # Folded into the gamma tables
                 auto_write=False,
-                pixel_order=config.get("trail_pixel_order", "RGB")
+                pixel_order=trail_order
             )
-            NEOPIXEL_REGISTRY[self.trail_pin] = trail_strip
-
-        self.trail_strip = NEOPIXEL_REGISTRY[self.trail_pin]
-        self.trail_buffer = [0] * len(self.trail_strip)
-
-        # Try to initialize I2C encoder, else fall back to simulation
-        try:
-            self.encoder_ss = Seesaw(i2c, addr=self.encoder_address)
-            self.encoder = rotaryio.IncrementalEncoder(self.encoder_ss)
-            self.encoder.position = self.last_position
-
-            self.encoder_ss.pin_mode(self.button_pin, self.encoder_ss.INPUT_PULLUP)
-            self.button = digitalio.DigitalIO(self.encoder_ss, self.button_pin)
-
-            self.encoder_pixel = SeesawNeoPixel(self.encoder_ss, self.neopixel_pin, 1)
-            self.encoder_pixel.brightness = self.brightness
-        except Exception as e:
-            print(f"[Simulated] Encoder at {hex(self.encoder_address)} - {e}")
-            self.encoder = SimulatedEncoder(self.last_position)
-            self.button = None
-            self.encoder_pixel = None
-
-    def update_encoder(self, max_value: int = 255, sensitivity: int = 1):
-        """Update the encoder value and button toggle."""
-        now = time.monotonic_ns()
-
-        # Handle button press for toggling enable
-        if self.button and not self.button.value and (now - self.button_pressed_at) > 400_000_000:
-            self.channel_enabled = not self.channel_enabled
-            self.button_pressed_at = now
-            print(f"Encoder {hex(self.encoder_address)} toggled to {'enabled' if self.channel_enabled else 'disabled'}")
+            NEOPIXEL_REGISTRY[self.trail_pin] = NEOPIXEL_REGISTRY.wrap(trail_strip, trail_order)
+
+        # Shows the value on this channel's color; set_mode("hue") for the Color Mix hue wheel
+        trail = ChannelTrail(
+            NEOPIXEL_REGISTRY, NEOPIXEL_REGISTRY[self.trail_pin], cursor_strip, self.cursor_pixel_id, color_index,
+            brightness=self.brightness,
+            cursor_brightness=SETTINGS.get("cursor_pixel_brightness", 1.0),
+            step_ns=int(DEFAULT_TRAIL_DELAY * 1_000_000_000),
+            animation=SETTINGS.get("trail_animation", {})
+        )
+        super().__init__(
+            int(config["encoder_addr"], 16),
+            saved_state.get("value", config.get("initial_value", 0)),
+            saved_state.get("enabled", True),
+            saved_state.get("encoder_position", 0),
+            encoder_accelerator(ENCODER_ACCELERATION),
+            trail
+        )
 
-        # Read and sanitize encoder position
-        raw_pos = -self.encoder.position
-        computed_pos = max(0, min(max_value, raw_pos * sensitivity))
-        delta = abs(computed_pos - self.last_position)
+        # The encoder board itself is opened by connect_encoder() when the bus finds it
+        self.encoder_board = None
+        self.encoder_pixel = None
+        self.encoder_pixel_shown = None
 
-        if delta > MAX_ENCODER_DELTA:
-            computed_pos = self.last_position  # Ignore large jumps
+    def connected_encoder_pixel(self):
+        """Return the encoder board's NeoPixel, or None while the board is missing.
 
-        self.pending_value = computed_pos
-        self.last_position = computed_pos
-        self.encoder.position = -int(computed_pos / sensitivity)
+        The pixel is recreated whenever the bus manager connects a new board
+        at this address.
+        """
+        encoder_board = ENCODER_BOARDS.get(self.encoder_address)
+        if encoder_board is not self.encoder_board:
+            self.encoder_board = encoder_board
+            self.encoder_pixel = None
+            self.encoder_pixel_shown = None
+            if encoder_board:
+                self.encoder_pixel = SeesawNeoPixel(encoder_board, self.neopixel_pin, 1)
+                self.encoder_pixel.brightness = self.brightness
+        return self.encoder_pixel
+
+    def handle_event(self, kind: int, value: int, timestamp: int, max_value: int = 255, sensitivity: int = 1):
+        """Apply one input event from this channel's encoder: turns change the value, a press toggles enable."""
+        super().handle_event(kind, value, timestamp, max_value, sensitivity)
+        if kind == EVENT_PRESS:
+            print(f"Encoder {hex(self.encoder_address)} toggled to {'enabled' if self.channel_enabled else 'disabled'}")
 
         # Update encoder NeoPixel
         # if self.channel_enabled and self.encoder_pixel:
@@ -109,29 +160,17 @@ class Channel:
         #     color[self.color_index] = self.pending_value
         #     self.encoder_pixel.fill(tuple(color))
 
-    def update_trail(self, trail_delay: float):
-        """Update the value trail for this channel."""
-        now = time.monotonic_ns()
-        if (now - self.last_trail_update) < int(trail_delay * 1_000_000):
-            return  # Not enough time passed
-
-        self.trail_buffer.insert(0, self.pending_value if self.channel_enabled else 0)
-        self.trail_buffer.pop()
-
-        for i in range(len(self.trail_buffer)):
-            value = dim_curve(self.trail_buffer[i])
-            color = [0, 0, 0]
-            color[self.color_index] = value
-            self.trail_strip[i] = tuple(color)
+def trail_stats(channels: list) -> str:
+    """Summarize the trail animators of a menu's channels for the stats line."""
+    steps = missed = late = dropped = 0
+    for chan in channels:
+        animator = chan.trail.animator
+        steps += animator.steps
+        missed += animator.missed
+        late += animator.late
+        dropped += animator.dropped
+    return f"trails {steps} steps / {missed} missed / {late} late ticks / {dropped} dropped"
 
-        self.trail_strip.show()
-
-        cursor_color = [0, 0, 0]
-        cursor_color[self.color_index] = dim_curve(self.trail_buffer[-1])
-        self.cursor_strip[self.cursor_pixel_id] = tuple(cursor_color)
-        self.cursor_strip.show()
-
-        self.last_trail_update = now
 
 class MenuEncoder:
     def __init__(self, config: dict, i2c, menu_count: int):
@@ -142,40 +181,23 @@ class MenuEncoder:
 
         self.accumulated_delta = 0
         self.step_threshold = 2  # Change this to 3 or more for even lower sensitivity
-        self.position = 0
-        self.last_position = 0
         self.selected_index = 0
-        self.button_pressed_at = time.monotonic_ns()
-
-        try:
-            self.encoder_ss = Seesaw(i2c, addr=self.encoder_address)
-            self.encoder = rotaryio.IncrementalEncoder(self.encoder_ss)
-            self.encoder.position = 0
-            self.encoder_ss.pin_mode(self.button_pin, self.encoder_ss.INPUT_PULLUP)
-            self.button = digitalio.DigitalIO(self.encoder_ss, self.button_pin)
-        except Exception as e:
-            print(f"[Simulated Menu Encoder] {e}")
-            self.encoder = SimulatedEncoder()
-            self.button = None
-
-    def update(self):
-        raw_position = self.encoder.position
-        delta = raw_position - self.last_position
-        self.last_position = raw_position
-
-        self.accumulated_delta += delta
-
-        if abs(self.accumulated_delta) >= self.step_threshold:
-            direction = int(self.accumulated_delta / abs(self.accumulated_delta))
-            self.selected_index = (self.selected_index + direction) % self.menu_count
-            self.accumulated_delta = 0
-            self.encoder.position = 0  # Reset hardware encoder to avoid drift
-            print(f"Menu switched to index {self.selected_index}")
+        self.accelerator = encoder_accelerator(ENCODER_ACCELERATION, accelerate=False)
+
+    def handle_event(self, kind: int, value: int, timestamp: int):
+        """Apply one input event from the menu encoder."""
+        if kind == EVENT_ROTATE:
+            self.accumulated_delta += self.accelerator.apply(value, timestamp)
+
+            if abs(self.accumulated_delta) >= self.step_threshold:
+                direction = int(self.accumulated_delta / abs(self.accumulated_delta))
+                self.selected_index = (self.selected_index + direction) % self.menu_count
+                self.accumulated_delta = 0
+                print(f"Menu switched to index {self.selected_index}")
 
         # Optional button press
-        if self.button and not self.button.value and (time.monotonic_ns() - self.button_pressed_at) > 400_000_000:
+        elif kind == EVENT_PRESS:
             print("Menu encoder button pressed!")
-            self.button_pressed_at = time.monotonic_ns()
 
 
 
@@ -185,21 +207,22 @@ class RGBMixMenu:
         self.menu_title_visible = True
         self.menu_display_time = 2
         self.first_draw = True
-        self.knob_sensitivity = state.get("knob_sensitivity", 3)
+        self.knob_sensitivity = state.get("knob_sensitivity", DEFAULT_KNOB_SENSITIVITY)
         self.display_group = display_group
         cursor_pin = getattr(board, SETTINGS["cursor_strip_pin"])
         if cursor_pin not in NEOPIXEL_REGISTRY:
+            cursor_order = SETTINGS.get("cursor_pixel_order", "RGB")
             strip = neopixel.NeoPixel(
                 cursor_pin,
                 SETTINGS["cursor_strip_count"],
-                brightness=SETTINGS.get("cursor_pixel_brightness", 1.0),
+                brightness=1.0,  # Folded into the gamma tables
                 auto_write=False,
-                pixel_order=SETTINGS.get("cursor_pixel_order", "RGB")
+                pixel_order=cursor_order
             )
-            NEOPIXEL_REGISTRY[cursor_pin] = strip
+            NEOPIXEL_REGISTRY[cursor_pin] = NEOPIXEL_REGISTRY.wrap(strip, cursor_order)
 
         self.cursor_strip = NEOPIXEL_REGISTRY[cursor_pin]
-        self.trail_delay = state.get("trail_delay", 0.01)
+        self.trail_delay = state.get("trail_delay", DEFAULT_TRAIL_DELAY)
         self.channels = [
             Channel(chan_config, i2c, self.cursor_strip, idx, state.get(f"channel_{idx}", {}))
             for idx, chan_config in enumerate(SETTINGS["channels"])
@@ -211,11 +234,9 @@ class RGBMixMenu:
         self.screen_height = SCREEN_HEIGHT
         self.bar_width = self.screen_width // 3
         self.bar_area_height = int(self.screen_height * 0.60)
-        self.bar_bitmaps = []
-        self.bar_tilegrids = []
-        self.last_heights = [0] * 3
-        self.last_label_texts = ["000"] * 3
 
+        # Every displayio property written per frame goes through the renderer
+        self.renderer = Renderer(trace=SETTINGS.get("render_trace", False))
 
         # Color preview background (top bar)
         self.preview_palette = displayio.Palette(1)
@@ -260,38 +281,40 @@ class RGBMixMenu:
             anchor_point=(0.5, 0.5),
             anchored_position=(self.screen_width // 2, 12)
         )
+        # Color name label memoization, keyed by the packed 24-bit color
+        self.color_name = ColorNameView(
+            self.renderer, self.color_name_label, self.preview_palette, ColorNamer(COLOR_NAME_CACHE_SIZE)
+        )
         enabled_colors = [0xFF0000, 0x00FF00, 0x0000FF]       # Red, Green, Blue
         disabled_colors = [0x400000, 0x004000, 0x000040]      # Dark Red, Dark Green, Dark Blue
 
-        self.bar_bitmaps = []
-        self.bar_tilegrids = []
+        self.bars = []
         self.value_labels = []
+        self.value_texts = []
         self.label_bg_tiles = []
         self.bar_palettes_enabled = []
         self.bar_palettes_disabled = []
 
+        bar_bottom = self.screen_height - 24
         for i in range(3):
-            # Bar bitmap and tilegrid
-            bitmap = displayio.Bitmap(self.bar_width, self.bar_area_height, 2)
-            enabled_palette = displayio.Palette(2)
-            enabled_palette[0] = 0x000000
-            enabled_palette[1] = enabled_colors[i]
+            # Bar drawn as a rectangle that is resized in place
+            enabled_palette = displayio.Palette(1)
+            enabled_palette[0] = enabled_colors[i]
 
-            disabled_palette = displayio.Palette(2)
-            disabled_palette[0] = 0x000000
-            disabled_palette[1] = disabled_colors[i]
+            disabled_palette = displayio.Palette(1)
+            disabled_palette[0] = disabled_colors[i]
 
             self.bar_palettes_enabled.append(enabled_palette)
             self.bar_palettes_disabled.append(disabled_palette)
 
-            tilegrid = displayio.TileGrid(
-                bitmap, pixel_shader=enabled_palette,  # Start enabled
+            shape = vectorio.Rectangle(
+                pixel_shader=enabled_palette,  # Start enabled
+                width=self.bar_width, height=1,
                 x=i * self.bar_width,
-                y=self.screen_height - self.bar_area_height - 24
+                y=bar_bottom - 1
             )
-            self.bar_bitmaps.append(bitmap)
-            self.bar_tilegrids.append(tilegrid)
-            self.display_group.append(tilegrid)
+            self.bars.append(ValueBar(self.renderer, shape, bar_bottom, self.bar_area_height))
+            self.display_group.append(shape)
 
             # Background box for label
             label_bg = displayio.Bitmap(self.bar_width, 20, 1)
@@ -312,6 +335,7 @@ class RGBMixMenu:
                 anchored_position=(int((i + 0.5) * self.bar_width), self.screen_height - 12)
             )
             self.value_labels.append(value_label)
+            self.value_texts.append(self.renderer.prop(value_label, "text", "000"))
             self.display_group.append(value_label)
 
             
@@ -347,19 +371,19 @@ class RGBMixMenu:
             self.box_tile = None
             self.display_group.append(self.color_name_label)
             self.menu_title_visible = False
+            self.renderer.mark(4)
 
     def update_screen_color_name(self):
-        rgb = [ channel.pending_value if channel.channel_enabled else 0 for channel in self.channels]
-        name = closest_named_color(*rgb)
-        self.color_name_label.text = name
-        self.color_name_label.color = 0x000000 if is_light_color(*rgb) else 0xFFFFFF
-        self.color_name_label.scale = 1 if len(name) > 26 else 2
-        self.preview_palette[0] = (rgb[0] << 16) | (rgb[1] << 8) | rgb[2]
+        self.color_name.update(*[channel.mix_value() for channel in self.channels])
+
+    def stats(self) -> str:
+        return f"{self.color_name.namer.stats()}, {self.renderer.stats()}, {trail_stats(self.channels)}"
 
 
 
     def update_screen(self):
         if self.first_draw: self.first_draw = False
+        self.renderer.begin_frame()
         self.update_screen_menu()
         self.update_screen_color_name()
 
@@ -376,28 +400,12 @@ class RGBMixMenu:
 
         for i, channel in enumerate(self.channels):
             val = channel.pending_value
-            height = int((val / 255) * self.bar_area_height)
-            bitmap = self.bar_bitmaps[i]
-            old_height = self.last_heights[i]
-
-            if height != old_height:
-                if height > old_height:
-                    # Add pixels
-                    for x in range(self.bar_width):
-                        for y in range(self.bar_area_height - height, self.bar_area_height - old_height):
-                            bitmap[x, y] = 1
-                else:
-                    # Remove pixels
-                    for x in range(self.bar_width):
-                        for y in range(self.bar_area_height - old_height, self.bar_area_height - height):
-                            bitmap[x, y] = 0
-                self.last_heights[i] = height
-            self.bar_tilegrids[i].pixel_shader = (self.bar_palettes_enabled[i] if channel.channel_enabled else self.bar_palettes_disabled[i] )
-
-            label_text = f"{val:03}"
-            if self.last_label_texts[i] != label_text:
-                self.value_labels[i].text = label_text
-                self.last_label_texts[i] = label_text
+            bar = self.bars[i]
+            bar.set_value(val)
+            bar.pixel_shader.set(self.bar_palettes_enabled[i] if channel.channel_enabled else self.bar_palettes_disabled[i])
+            self.value_texts[i].set(f"{val:03}")
+
+        self.renderer.end_frame()
 
 
 
@@ -405,20 +413,19 @@ class RGBMixMenu:
 
 
     def update_trails(self):
+        now = time.monotonic_ns()
         for channel in self.channels:
-            channel.update_trail(self.trail_delay)
+            channel.update_trail(self.trail_delay, now)
 
-    def update_encoders(self, enabled=True, sensitivity=1):
-        if enabled:
-            for channel in self.channels:
-                channel.update_encoder(sensitivity=sensitivity)
-        
+    def handle_event(self, kind: int, source: int, value: int, timestamp: int):
+        """Route an input event to the channel whose encoder sent it."""
+        dispatch_event(self.channels, kind, source, value, timestamp, self.knob_sensitivity)
 
     def export_state(self):
         state = {"trail_delay": self.trail_delay, "knob_sensitivity": self.knob_sensitivity}
         for idx, chan in enumerate(self.channels):
             state[f"channel_{idx}"] = {
-                "value": chan.value,
+                "value": chan.pending_value,
                 "encoder_position": chan.last_position,
                 "enabled": chan.channel_enabled
             }
@@ -430,20 +437,21 @@ class ColorMixMenu:
         self.menu_title_visible = True
         self.menu_display_time = 2
         self.first_draw = True
-        self.knob_sensitivity = state.get("knob_sensitivity", 3)
-        self.trail_delay = state.get("trail_delay", 0.01)
+        self.knob_sensitivity = state.get("knob_sensitivity", DEFAULT_KNOB_SENSITIVITY)
+        self.trail_delay = state.get("trail_delay", DEFAULT_TRAIL_DELAY)
         self.display_group = display_group
 
         cursor_pin = getattr(board, SETTINGS["cursor_strip_pin"])
         if cursor_pin not in NEOPIXEL_REGISTRY:
+            cursor_order = SETTINGS.get("cursor_pixel_order", "RGB")
             strip = neopixel.NeoPixel(
                 cursor_pin,
                 SETTINGS["cursor_strip_count"],
-                brightness=SETTINGS.get("cursor_pixel_brightness", 1.0),
+                brightness=1.0,  # Folded into the gamma tables
                 auto_write=False,
-                pixel_order=SETTINGS.get("cursor_pixel_order", "RGB")
+                pixel_order=cursor_order
             )
-            NEOPIXEL_REGISTRY[cursor_pin] = strip
+            NEOPIXEL_REGISTRY[cursor_pin] = NEOPIXEL_REGISTRY.wrap(strip, cursor_order)
 
         self.cursor_strip = NEOPIXEL_REGISTRY[cursor_pin]
 
@@ -452,6 +460,9 @@ class ColorMixMenu:
             for idx, chan_config in enumerate(SETTINGS["channels"])
         ]
 
+        for chan in self.channels:
+            chan.trail.set_mode("hue")
+
         self.channel_names = ["Hue1", "Hue2", "Hue3"]
 
         self.screen_width = SCREEN_WIDTH
@@ -488,49 +499,44 @@ class ColorMixMenu:
         self.preview_palette[0] = (avg_rgb[0] << 16) | (avg_rgb[1] << 8) | avg_rgb[2]
 
     def update_trails(self):
-        pass
-        # for chan in self.channels:
-        #     chan.update_trail(self.trail_delay)
+        now = time.monotonic_ns()
+        for chan in self.channels:
+            chan.update_trail(self.trail_delay, now)
 
-    def update_encoders(self, enabled=True, sensitivity=1):
-        if enabled:
-            for chan in self.channels:
-                chan.update_encoder(sensitivity=sensitivity)
+    def stats(self) -> str:
+        return trail_stats(self.channels)
+
+    def handle_event(self, kind: int, source: int, value: int, timestamp: int):
+        """Route an input event to the channel whose encoder sent it."""
+        dispatch_event(self.channels, kind, source, value, timestamp, self.knob_sensitivity)
 
     def update_screen(self):
         if self.first_draw:
             self.first_draw = False
         self.update_screen_color_name()
 
-        # Push RGB colors directly to trail and cursor
+        # Update encoder NeoPixels to the full hue color, over I2C only when it changed
+        hue_pixels = GAMMA_TABLES.hue_pixels()
         for chan in self.channels:
-            h = (chan.pending_value / 255.0) * 360.0
-            rgb_float = hsv_to_rgb(h / 360.0, 1.0, 1.0)
-            r, g, b = [dim_curve(int(c * 255), gamma=0.8) for c in rgb_float]
-            rgb_tuple = (r, g, b)
-
-            # Update trail
-            chan.trail_buffer.insert(0, rgb_tuple if chan.channel_enabled else (0, 0, 0))
-            chan.trail_buffer.pop()
-            for i in range(len(chan.trail_buffer)):
-                chan.trail_strip[i] = chan.trail_buffer[i]
-            chan.trail_strip.show()
-
-            # Update cursor
-            chan.cursor_strip[chan.cursor_pixel_id] = chan.trail_buffer[-1]
-            chan.cursor_strip.show()
-
-            #  Update encoder NeoPixel to full RGB color
-            if chan.encoder_pixel and chan.channel_enabled:
-                chan.encoder_pixel.fill(rgb_tuple)
-            elif chan.encoder_pixel:
-                chan.encoder_pixel.fill((0, 0, 0))  # Off if disabled
+            encoder_pixel = chan.connected_encoder_pixel()
+            if not encoder_pixel:
+                continue
+            value = chan.pending_value if chan.channel_enabled else TRAIL_OFF  # Off if disabled
+            if value != chan.encoder_pixel_shown:
+                started = time.monotonic_ns()
+                try:
+                    encoder_pixel.fill(hue_pixels[value])
+                except (OSError, RuntimeError):
+                    I2C_BUS.record(chan.encoder_address, time.monotonic_ns() - started, False)
+                    continue
+                I2C_BUS.record(chan.encoder_address, time.monotonic_ns() - started, True)
+                chan.encoder_pixel_shown = value
 
     def export_state(self):
         state = {"trail_delay": self.trail_delay, "knob_sensitivity": self.knob_sensitivity}
         for idx, chan in enumerate(self.channels):
             state[f"colormix_channel_{idx}"] = {
-                "value": chan.value,
+                "value": chan.pending_value,
                 "encoder_position": chan.last_position,
                 "enabled": chan.channel_enabled
             }
@@ -550,38 +556,248 @@ display = ST7789(display_bus, width=320, height=172, colstart=34, rotation=270)
 main_group = displayio.Group()
 display.root_group = main_group
 
-i2c = board.I2C()
-state = {}
-
-current_menu = RGBMixMenu(main_group, SETTINGS, i2c, state)
-current_menu.knob_sensitivity = 3
-tick_count = 0
-
-
+i2c = CountingI2C(board.I2C())
+I2C_RETRY = SETTINGS.get("i2c_retry", {})
+I2C_BUS = I2CBusManager(
+    i2c,
+    retry_min=I2C_RETRY.get("min", 0.5),
+    retry_max=I2C_RETRY.get("max", 30.0),
+    fail_limit=I2C_RETRY.get("fail_limit", 3)
+)
+ENCODER_INPUT.bus = I2C_BUS
+
+# Seesaw boards that are connected, by address; the rest run as SimulatedEncoder
+ENCODER_BOARDS = {}
+
+
+def connect_encoder(address: int, button_pin: int):
+    """Open the seesaw at address and read it in place of its simulated encoder."""
+    seesaw = Seesaw(i2c, addr=address)
+    seesaw.pin_mode(button_pin, seesaw.INPUT_PULLUP)
+    ENCODER_INPUT.attach(seesaw, button_pin, address)
+    ENCODER_BOARDS[address] = seesaw
+    print(f"Encoder at {hex(address)} connected")
+
+
+def disconnect_encoder(address: int):
+    ENCODER_BOARDS.pop(address, None)
+    ENCODER_INPUT.add(address, SimulatedEncoder())
+    print(f"[Simulated] Encoder at {hex(address)}")
+
+
+def want_encoder(config: dict):
+    address = int(config["encoder_addr"], 16)
+    button_pin = config["button_pin"]
+    ENCODER_INPUT.add(address, SimulatedEncoder())
+    I2C_BUS.want(address, lambda: connect_encoder(address, button_pin), lambda: disconnect_encoder(address))
+
+
+print(f"I2C devices found: {[hex(address) for address in I2C_BUS.scan()]}")
+want_encoder(SETTINGS["menu_encoder"])
+for channel_config in SETTINGS["channels"]:
+    want_encoder(channel_config)
+
+# Encoder traces: record what the real boards report, or replay a recording
+# through simulated encoders. Recording needs CIRCUITPY writable from boot.py.
+ENCODER_TRACE = SETTINGS.get("encoder_trace", {})
+if ENCODER_TRACE.get("record"):
+    try:
+        ENCODER_INPUT.recorder = TraceRecorder(ENCODER_TRACE["record"])
+        print(f"Recording encoder trace to {ENCODER_TRACE['record']}")
+    except OSError as e:
+        print(f"[Trace] Can't record to {ENCODER_TRACE['record']} - {e}")
+if ENCODER_TRACE.get("replay"):
+    try:
+        replay_trace(ENCODER_INPUT, load_trace(ENCODER_TRACE["replay"]))
+        print(f"Replaying encoder trace {ENCODER_TRACE['replay']}")
+    except (OSError, ValueError) as e:
+        print(f"[Trace] Can't replay {ENCODER_TRACE['replay']} - {e}")
+
+# Menu state survives resets in rotating slots of NVM, or of a flash file if
+# state_store.file is set (CIRCUITPY must be writable from code for that).
+# On the RP2040 every NVM write erases the same flash sector, so the idle and
+# min_interval limits are what keep the flash from wearing out.
+STATE_SETTINGS = SETTINGS.get("state_store", {})
+
+
+def open_state_store():
+    slots = STATE_SETTINGS.get("slots", 8)
+    slot_size = STATE_SETTINGS.get("slot_size", 64)
+    try:
+        if STATE_SETTINGS.get("file"):
+            storage = FileStorage(STATE_SETTINGS["file"], slots * slot_size)
+        else:
+            storage = microcontroller.nvm
+            if storage is None:
+                print("[State] No NVM on this board, state won't be saved")
+                return None
+        return StateStore(storage, slots, slot_size,
+                          idle=STATE_SETTINGS.get("idle", 10.0),
+                          min_interval=STATE_SETTINGS.get("min_interval", 60.0))
+    except (OSError, ValueError) as e:
+        print(f"[State] Can't open state storage - {e}")
+        return None
+
+
+STATE_STORE = open_state_store()
+state = STATE_STORE.load() if STATE_STORE else {}
+if state:
+    print(f"Restored saved state #{STATE_STORE.sequence}")
+
+# Seconds between task rate / menu stats prints, 0 to disable
+stats_interval = SETTINGS.get("stats_interval", 0)
 
 menus = [RGBMixMenu, ColorMixMenu]
 menu_names = ["RGB Mix", "Color Mix"]
 
 menu_encoder = MenuEncoder(SETTINGS["menu_encoder"], i2c, len(menus))
-menu_index = 0
-
-
-while True:
-    
-    if hasattr(current_menu, "update_trails"):    current_menu.update_trails()
-    current_menu.update_encoders(enabled=True,sensitivity=current_menu.knob_sensitivity)
-    current_menu.update_screen()
-    # time.sleep(0.05)
-    menu_encoder.update()
+menu_index = state.get("menu_index", 0) % len(menus)
+menu_encoder.selected_index = menu_index
+current_menu = menus[menu_index](main_group, SETTINGS, i2c, state)
+
+# Runs per second of each task; the display is refreshed by its own task only.
+# These are upper bounds, not guarantees: every task runs on the one core and
+# none of them is preempted. A seesaw read blocks for its settle delay
+# (encoder_read_delay, about 64 ms per encoders run with four boards read in
+# one go) and display.refresh() blocks until the frame is sent, so while one
+# task is in there the others wait. The stats line shows what each task
+# actually achieved: its rate, longest gap between runs and time per run.
+TASK_RATES = SETTINGS.get("task_rates", {})
+display.auto_refresh = False
+task_runs = {}
+task_busy_ns = {}     # Time spent inside each task's step, awaits included
+task_max_gap_ns = {}  # Longest time between the starts of two runs
+
+
+async def run_every(name: str, rate: float, step):
+    """Call step() rate times per second, awaiting between calls so other tasks run.
+
+    Deadlines advance by a fixed interval; a task that falls behind skips
+    ahead instead of running back to back to catch up, so `rate` is only an
+    upper bound. Runs, time spent and the longest gap are counted for the
+    stats line.
+    """
+    interval = int(1_000_000_000 / rate)
+    next_run = time.monotonic_ns()
+    task_runs[name] = 0
+    task_busy_ns[name] = 0
+    task_max_gap_ns[name] = 0
+    last_start = None
+    while True:
+        started = time.monotonic_ns()
+        if last_start is not None:
+            task_max_gap_ns[name] = max(task_max_gap_ns[name], started - last_start)
+        last_start = started
+        result = step()
+        if result is not None:
+            await result
+        task_runs[name] += 1
+        task_busy_ns[name] += time.monotonic_ns() - started
+        next_run += interval
+        delay = next_run - time.monotonic_ns()
+        if delay < 0:
+            next_run -= delay
+            delay = 0
+        await asyncio.sleep(delay / 1_000_000_000)
+
+
+def encoders_step():
+    ENCODER_INPUT.update()
+    events = ENCODER_INPUT.events
+    if events and STATE_STORE:
+        STATE_STORE.touch(time.monotonic_ns())
+    while events:
+        kind, source, value, timestamp = events.pop()
+        if source == menu_encoder.encoder_address:
+            menu_encoder.handle_event(kind, value, timestamp)
+        else:
+            current_menu.handle_event(kind, source, value, timestamp)
+
+
+def menu_encoder_step():
+    global current_menu, main_group, menu_index
 
     # If menu index changed
     if menu_encoder.selected_index != menu_index:
         menu_index = menu_encoder.selected_index
         print(f"Switching to menu: {menu_names[menu_index]}")
-        
+        state.update(current_menu.export_state())
+        state["menu_index"] = menu_index
+
         # current_menu.deinit()  # <<< Clean up NeoPixels and pins
 
         main_group = displayio.Group()
         display.root_group = main_group
         current_menu = menus[menu_index](main_group, SETTINGS, i2c, state)
-    tick_count +=1 
+
+
+def bus_step():
+    I2C_BUS.update()
+
+
+def trails_step():
+    if hasattr(current_menu, "update_trails"):
+        current_menu.update_trails()
+    NEOPIXEL_REGISTRY.flush()
+
+
+async def display_step():
+    current_menu.update_screen()
+    await asyncio.sleep(0)  # Let input run between updating the labels and pushing pixels
+    display.refresh(target_frames_per_second=None)
+
+
+def state_step():
+    state.update(current_menu.export_state())
+    state["menu_index"] = menu_index
+    if STATE_STORE:
+        STATE_STORE.update(state, time.monotonic_ns())
+
+
+stats_started_at = None  # Set by the stats task's first run, which prints nothing
+
+
+def task_stats(seconds: float) -> str:
+    """Summarize each task's achieved rate, longest gap and time per run since startup."""
+    parts = []
+    for name, runs in task_runs.items():
+        busy = task_busy_ns[name] / runs / 1_000_000 if runs else 0
+        parts.append(f"{name} {runs / seconds:.1f}/s max gap {task_max_gap_ns[name] / 1_000_000:.0f}ms "
+                     f"{busy:.1f}ms/run")
+    return ", ".join(parts)
+
+
+def stats_step():
+    # Every figure on the line, task rates included, is averaged or counted
+    # since startup, so they can be compared with each other.
+    global stats_started_at
+    now = time.monotonic_ns()
+    if stats_started_at is None:
+        stats_started_at = now
+        return
+    seconds = (now - stats_started_at) / 1_000_000_000
+    if not seconds:
+        return
+    menu_stats = current_menu.stats() if hasattr(current_menu, "stats") else ""
+    print(f"[stats] since startup ({seconds:.0f}s): {task_stats(seconds)}; {menu_stats} "
+          f"{NEOPIXEL_REGISTRY.stats()}, {ENCODER_INPUT.stats()}, {I2C_BUS.stats()}"
+          f"{', ' + STATE_STORE.stats() if STATE_STORE else ''}")
+
+
+async def main():
+    tasks = [
+        asyncio.create_task(run_every("encoders", TASK_RATES.get("encoders", 200), encoders_step)),
+        asyncio.create_task(run_every("menu_encoder", TASK_RATES.get("menu_encoder", 20), menu_encoder_step)),
+        asyncio.create_task(run_every("trails", TASK_RATES.get("trails", 100), trails_step)),
+        asyncio.create_task(run_every("display", TASK_RATES.get("display", 30), display_step)),
+        asyncio.create_task(run_every("state", TASK_RATES.get("state", 1), state_step)),
+        asyncio.create_task(run_every("bus", TASK_RATES.get("bus", 2), bus_step)),
+    ]
+    if stats_interval:
+        tasks.append(asyncio.create_task(run_every("stats", 1 / stats_interval, stats_step)))
+    if ENCODER_INPUT.recorder:
+        tasks.append(asyncio.create_task(run_every("trace", 1, ENCODER_INPUT.recorder.flush)))
+    await asyncio.gather(*tasks)
+
+
+asyncio.run(main())
@@ -1,5 +1,9 @@
 # === Color Constants & Helpers ===
 import json
+import math
+import struct
+import sys
+from array import array
 # NAMED_COLORS = {
 #     "black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0),
 #     "lime": (0, 255, 0), "blue": (0, 0, 255), "yellow": (255, 255, 0),
@@ -16,8 +20,800 @@ import json
 #     "darkgreen": (0, 100, 0), "darkblue": (0, 0, 139), "darkcyan": (0, 139, 139),
 #     "darkmagenta": (139, 0, 139), "darkyellow": (128, 128, 0)
 # }
-with open('named_colors.json') as f:
-    named_colors_raw = json.load(f)
+NAMED_COLORS_FILE = "named_colors.bin"
+NAMED_COLORS_JSON_FILE = "named_colors.json"
+PALETTE_MAGIC = b"NCPB"
+PALETTE_VERSION = 1
+PALETTE_HEADER = "<4sBHH"  # magic, version, color count, name table size
+
+# Flat r, g, b bytes for every palette entry, indexed by 3 * palette index
+palette_rgb = bytearray()
+# Length-prefixed utf-8 names, and the offset of each entry's name in it
+palette_names = bytearray()
+palette_name_offsets = array("H")
+# Index of the first entry with the same name, so runner-ups can skip repeats of a name
+palette_name_ids = array("H")
+
+# Bumped whenever the palette changes so stateful searches can notice
+palette_generation = 0
+
+NAME_LUT_FILE = "named_colors.lut"
+NAME_LUT_MAGIC = b"NCLT"
+NAME_LUT_VERSION = 1
+NAME_LUT_HEADER = "<4sBBHII"  # magic, version, bits, palette count, checksum, candidate words
+NAME_LUT_LIST_FLAG = 0x8000
+
+name_lut_bits = 0
+# Little-endian uint16 words, kept as the bytearrays the file was read into
+name_lut_cells = None       # palette index, or flag | offset into candidates
+name_lut_candidates = None  # [count, index, index, ...] runs for boundary cells
+
+
+def palette_checksum() -> int:
+    """Adler-32 style checksum over the palette colors and names, used to detect a stale LUT."""
+    a, b = 1, 0
+    for index in range(len(palette_name_offsets)):
+        offset = palette_name_offsets[index]
+        for part in (palette_rgb[3 * index:3 * index + 3],
+                     palette_names[offset + 1:offset + 1 + palette_names[offset]]):
+            for byte in part:
+                a = (a + byte) % 65521
+                b = (b + a) % 65521
+    return (b << 16) | a
+
+
+def load_name_lut(path: str = NAME_LUT_FILE) -> bool:
+    """Load a quantized RGB -> palette index table built by tools/build_name_lut.py.
+
+    The LUT is optional: at 4 bits it takes about 30 KB of heap, so it is
+    only loaded when asked for. Returns False (and leaves the k-d tree or a
+    NameTracker in charge) when the file is missing, was built from a
+    different palette, is truncated, or doesn't fit in memory.
+    """
+    global name_lut_bits, name_lut_cells, name_lut_candidates
+    name_lut_cells = name_lut_candidates = None
+    cells = candidates = None
+    try:
+        with open(path, "rb") as f:
+            header = f.read(struct.calcsize(NAME_LUT_HEADER))
+            if len(header) != struct.calcsize(NAME_LUT_HEADER):
+                print(f"[color_utils] {path} is truncated, ignoring")
+                return False
+            magic, version, bits, count, checksum, candidate_words = struct.unpack(NAME_LUT_HEADER, header)
+            if magic != NAME_LUT_MAGIC or version != NAME_LUT_VERSION:
+                print(f"[color_utils] {path} is not a v{NAME_LUT_VERSION} name LUT, ignoring")
+                return False
+            if count != len(palette_name_offsets) or checksum != palette_checksum():
+                print(f"[color_utils] {path} was built for another palette, ignoring")
+                return False
+            cells = bytearray(2 << (3 * bits))
+            candidates = bytearray(2 * candidate_words)
+            if f.readinto(cells) != len(cells) or f.readinto(candidates) != len(candidates):
+                print(f"[color_utils] {path} is truncated, ignoring")
+                return False
+    except OSError:
+        return False
+    except MemoryError:
+        cells = candidates = None
+        print(f"[color_utils] not enough memory for {path}, ignoring")
+        return False
+    name_lut_bits = bits
+    name_lut_cells = cells
+    name_lut_candidates = candidates
+    return True
+
+
+def lut_color_index(r: int, g: int, b: int, exact: bool = True) -> int:
+    """Return the palette index of the closest named color using the loaded LUT.
+
+    Cells that straddle a boundary between palette entries store a short
+    candidate list. With exact=True those candidates are compared against the
+    actual color, otherwise the entry closest to the cell center is used.
+    """
+    bits = name_lut_bits
+    shift = 8 - bits
+    cell = 2 * (((r >> shift) << (bits + bits)) | ((g >> shift) << bits) | (b >> shift))
+    cells = name_lut_cells
+    value = cells[cell] | (cells[cell + 1] << 8)
+    if not value & NAME_LUT_LIST_FLAG:
+        return value
+    candidates = name_lut_candidates
+    offset = 2 * ((value & ~NAME_LUT_LIST_FLAG) + 1)
+    if not exact:
+        return candidates[offset] | (candidates[offset + 1] << 8)
+    rgb = palette_rgb
+    best_index = 0xFFFF
+    best_dist = 0x7FFFFFFF
+    end = offset + 2 * (candidates[offset - 2] | (candidates[offset - 1] << 8))
+    for k in range(offset, end, 2):
+        index = candidates[k] | (candidates[k + 1] << 8)
+        j = 3 * index
+        dr = r - rgb[j]
+        dg = g - rgb[j + 1]
+        db = b - rgb[j + 2]
+        dist = dr * dr + dg * dg + db * db
+        if dist < best_dist or (dist == best_dist and index < best_index):
+            best_dist = dist
+            best_index = index
+    return best_index
+
+
+# k-d tree over the distinct palette colors. Nodes live in flat arrays using an
+# implicit layout: the node for the index range [lo, hi) sits at (lo + hi) // 2
+# with its children covering [lo, mid) and [mid + 1, hi).
+kd_rgb = bytearray()    # r, g, b of each node
+kd_index = array("H")   # palette index of each node
+kd_axis = bytearray()   # split channel of each node (0 = r, 1 = g, 2 = b)
+nearest_result = array("l", [0, 0, 0, 0])  # best index, best dist, second index, second dist
+kd_stack_lo = array("H")
+kd_stack_hi = array("H")
+kd_stack_dist = array("l")
+
+NO_INDEX = 0xFFFF
+FAR_DIST = 0x7FFFFFFF
+
+# Below this many distinct colors a straight scan beats walking the tree
+KD_TREE_MIN_COLORS = 64
+
+
+def build_kd_tree():
+    """(Re)build the k-d tree from palette_rgb. Colors listed more than once keep their first index."""
+    global kd_rgb, kd_index, kd_axis, kd_stack_lo, kd_stack_hi, kd_stack_dist
+    seen = set()
+    points = []
+    for index in range(len(palette_rgb) // 3):
+        color = (palette_rgb[3 * index], palette_rgb[3 * index + 1], palette_rgb[3 * index + 2])
+        if color not in seen:
+            seen.add(color)
+            points.append((color, index))
+
+    count = len(points)
+    axes = bytearray(count)
+
+    def place(lo, hi):
+        if hi - lo < 2:
+            return
+        span = points[lo:hi]
+        axis = max(range(3), key=lambda c: max(p[0][c] for p in span) - min(p[0][c] for p in span))
+        span.sort(key=lambda p: p[0][axis])
+        points[lo:hi] = span
+        mid = (lo + hi) // 2
+        axes[mid] = axis
+        place(lo, mid)
+        place(mid + 1, hi)
+
+    place(0, count)
+    kd_rgb = bytearray(c for color, _ in points for c in color)
+    kd_index = array("H", [index for _, index in points])
+    kd_axis = axes
+
+    depth = 1
+    while (1 << depth) <= count:
+        depth += 1
+    kd_stack_lo = array("H", [0] * (depth + 2))
+    kd_stack_hi = array("H", [0] * (depth + 2))
+    kd_stack_dist = array("l", [0] * (depth + 2))
+
+
+def kd_nearest(r: int, g: int, b: int, want_second: bool = False) -> int:
+    """Return the palette index closest to (r, g, b) using the k-d tree.
+
+    The best and (with want_second) runner-up index and squared distance are
+    also left in nearest_result; the runner-up is the closest entry with a
+    different name. The search walks a preallocated stack so it does
+    not allocate per query.
+    """
+    rgb = kd_rgb
+    index = kd_index
+    axes = kd_axis
+    stack_lo = kd_stack_lo
+    stack_hi = kd_stack_hi
+    stack_dist = kd_stack_dist
+    name_ids = palette_name_ids
+
+    best_index = second_index = NO_INDEX
+    best_dist = second_dist = FAR_DIST
+    stack_lo[0] = 0
+    stack_hi[0] = len(index)
+    stack_dist[0] = 0
+    sp = 1
+    while sp:
+        sp -= 1
+        if stack_dist[sp] > (second_dist if want_second else best_dist):
+            continue
+        lo = stack_lo[sp]
+        hi = stack_hi[sp]
+        mid = (lo + hi) >> 1
+        j = 3 * mid
+        dr = r - rgb[j]
+        dg = g - rgb[j + 1]
+        db = b - rgb[j + 2]
+        dist = dr * dr + dg * dg + db * db
+        i = index[mid]
+        if dist < best_dist or (dist == best_dist and i < best_index):
+            if best_index != NO_INDEX and name_ids[i] != name_ids[best_index]:
+                second_dist = best_dist
+                second_index = best_index
+            best_dist = dist
+            best_index = i
+        elif (want_second and name_ids[i] != name_ids[best_index]
+                and (dist < second_dist or (dist == second_dist and i < second_index))):
+            second_dist = dist
+            second_index = i
+
+        axis = axes[mid]
+        diff = dr if axis == 0 else dg if axis == 1 else db
+        # Push the far side first so the near side is searched first
+        if diff > 0:
+            if lo < mid:
+                stack_lo[sp] = lo
+                stack_hi[sp] = mid
+                stack_dist[sp] = diff * diff
+                sp += 1
+            if mid + 1 < hi:
+                stack_lo[sp] = mid + 1
+                stack_hi[sp] = hi
+                stack_dist[sp] = 0
+                sp += 1
+        else:
+            if mid + 1 < hi:
+                stack_lo[sp] = mid + 1
+                stack_hi[sp] = hi
+                stack_dist[sp] = diff * diff
+                sp += 1
+            if lo < mid:
+                stack_lo[sp] = lo
+                stack_hi[sp] = mid
+                stack_dist[sp] = 0
+                sp += 1
+
+    nearest_result[0] = best_index
+    nearest_result[1] = best_dist
+    nearest_result[2] = second_index
+    nearest_result[3] = second_dist
+    return best_index
+
+
+def linear_nearest(r: int, g: int, b: int, want_second: bool = False) -> int:
+    """Return the palette index closest to (r, g, b) with a single pass over the palette.
+
+    Like kd_nearest, the best two matches are tracked in locals and left in
+    nearest_result, so nothing is allocated per palette entry.
+    """
+    rgb = kd_rgb
+    index = kd_index
+    name_ids = palette_name_ids
+    best_index = second_index = NO_INDEX
+    best_dist = second_dist = FAR_DIST
+    j = 0
+    for i in index:
+        dr = r - rgb[j]
+        dg = g - rgb[j + 1]
+        db = b - rgb[j + 2]
+        j += 3
+        dist = dr * dr + dg * dg + db * db
+        if dist < best_dist or (dist == best_dist and i < best_index):
+            if best_index != NO_INDEX and name_ids[i] != name_ids[best_index]:
+                second_dist = best_dist
+                second_index = best_index
+            best_dist = dist
+            best_index = i
+        elif (want_second and name_ids[i] != name_ids[best_index]
+                and (dist < second_dist or (dist == second_dist and i < second_index))):
+            second_dist = dist
+            second_index = i
+
+    nearest_result[0] = best_index
+    nearest_result[1] = best_dist
+    nearest_result[2] = second_index
+    nearest_result[3] = second_dist
+    return best_index
+
+
+nearest_search = linear_nearest
+
+
+# === Perceptual (CIELAB) naming ===
+NAMING_RGB = "rgb"
+NAMING_LAB = "lab"
+naming_mode = NAMING_RGB
+
+# How many Delta E 76 nearest entries get the full Delta E 2000 comparison
+LAB_CANDIDATES = 4
+
+# sRGB 0-255 -> linear light, so conversions only need one cube root per axis
+SRGB_TO_LINEAR = array("f", [
+    c / 255 / 12.92 if c <= 10 else pow((c / 255 + 0.055) / 1.055, 2.4)
+    for c in range(256)
+])
+
+palette_lab = array("f")  # L, a, b per distinct color, aligned with kd_index
+# k-d tree over palette_lab, in the same implicit layout as the RGB tree:
+# lab_tree_order[node] is the position in kd_index / palette_lab of its color
+lab_tree_order = array("H")
+lab_tree_axis = bytearray()  # split channel of each node (0 = L, 1 = a, 2 = b)
+lab_tree_min = array("f")    # L, a, b bounding box of each node's subtree
+lab_tree_max = array("f")
+lab_stack_lo = array("H")
+lab_stack_hi = array("H")
+lab_result = [0, 0.0, 0, 0.0]  # best index, best dE2000^2, second index, second dE2000^2
+lab_candidate_index = array("H", [0] * LAB_CANDIDATES)
+lab_candidate_dist = array("f", [0.0] * LAB_CANDIDATES)
+
+
+def _lab_f(t: float) -> float:
+    return pow(t, 1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+
+def rgb_to_lab(r: int, g: int, b: int) -> tuple:
+    """Convert 0-255 sRGB to CIELAB (D65 white)."""
+    lr = SRGB_TO_LINEAR[r]
+    lg = SRGB_TO_LINEAR[g]
+    lb = SRGB_TO_LINEAR[b]
+    fx = _lab_f((0.4124564 * lr + 0.3575761 * lg + 0.1804375 * lb) / 0.95047)
+    fy = _lab_f(0.2126729 * lr + 0.7151522 * lg + 0.0721750 * lb)
+    fz = _lab_f((0.0193339 * lr + 0.1191920 * lg + 0.9503041 * lb) / 1.08883)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def delta_e2000(l1: float, a1: float, b1: float, l2: float, a2: float, b2: float) -> float:
+    """Return the CIEDE2000 color difference between two Lab colors."""
+    c1 = math.sqrt(a1 * a1 + b1 * b1)
+    c2 = math.sqrt(a2 * a2 + b2 * b2)
+    c_mean7 = pow((c1 + c2) / 2, 7)
+    g = 0.5 * (1 - math.sqrt(c_mean7 / (c_mean7 + 6103515625)))  # 25 ** 7
+    a1p = (1 + g) * a1
+    a2p = (1 + g) * a2
+    c1p = math.sqrt(a1p * a1p + b1 * b1)
+    c2p = math.sqrt(a2p * a2p + b2 * b2)
+    h1p = math.degrees(math.atan2(b1, a1p)) % 360 if c1p else 0.0
+    h2p = math.degrees(math.atan2(b2, a2p)) % 360 if c2p else 0.0
+
+    dl = l2 - l1
+    dc = c2p - c1p
+    if c1p * c2p == 0:
+        dh = 0.0
+    elif abs(h2p - h1p) <= 180:
+        dh = h2p - h1p
+    elif h2p - h1p > 180:
+        dh = h2p - h1p - 360
+    else:
+        dh = h2p - h1p + 360
+    dh_big = 2 * math.sqrt(c1p * c2p) * math.sin(math.radians(dh / 2))
+
+    l_mean = (l1 + l2) / 2
+    c_mean_p = (c1p + c2p) / 2
+    if c1p * c2p == 0:
+        h_mean = h1p + h2p
+    elif abs(h1p - h2p) <= 180:
+        h_mean = (h1p + h2p) / 2
+    elif h1p + h2p < 360:
+        h_mean = (h1p + h2p + 360) / 2
+    else:
+        h_mean = (h1p + h2p - 360) / 2
+
+    t = (1 - 0.17 * math.cos(math.radians(h_mean - 30))
+         + 0.24 * math.cos(math.radians(2 * h_mean))
+         + 0.32 * math.cos(math.radians(3 * h_mean + 6))
+         - 0.20 * math.cos(math.radians(4 * h_mean - 63)))
+    l_mean_50 = (l_mean - 50) ** 2
+    s_l = 1 + 0.015 * l_mean_50 / math.sqrt(20 + l_mean_50)
+    s_c = 1 + 0.045 * c_mean_p
+    s_h = 1 + 0.015 * c_mean_p * t
+    c_mean_p7 = pow(c_mean_p, 7)
+    r_t = (-2 * math.sqrt(c_mean_p7 / (c_mean_p7 + 6103515625))
+           * math.sin(math.radians(60 * math.exp(-(((h_mean - 275) / 25) ** 2)))))
+
+    tl = dl / s_l
+    tc = dc / s_c
+    th = dh_big / s_h
+    return math.sqrt(tl * tl + tc * tc + th * th + r_t * tc * th)
+
+
+def build_lab_palette():
+    """Convert every distinct palette color to Lab once, in kd_index order, and build the Lab k-d tree."""
+    global palette_lab, lab_tree_order, lab_tree_axis, lab_tree_min, lab_tree_max, lab_stack_lo, lab_stack_hi
+    count = len(kd_index)
+    lab = array("f", [0.0] * len(kd_rgb))
+    for n in range(count):
+        j = 3 * n
+        lab[j], lab[j + 1], lab[j + 2] = rgb_to_lab(kd_rgb[j], kd_rgb[j + 1], kd_rgb[j + 2])
+
+    order = list(range(count))
+    axes = bytearray(count)
+    box_min = array("f", [0.0] * len(lab))
+    box_max = array("f", [0.0] * len(lab))
+
+    def place(lo, hi):
+        if hi <= lo:
+            return
+        span = order[lo:hi]
+        mid = (lo + hi) // 2
+        for c in range(3):
+            box_min[3 * mid + c] = min(lab[3 * n + c] for n in span)
+            box_max[3 * mid + c] = max(lab[3 * n + c] for n in span)
+        if hi - lo < 2:
+            return
+        axis = max(range(3), key=lambda c: box_max[3 * mid + c] - box_min[3 * mid + c])
+        span.sort(key=lambda n: lab[3 * n + axis])
+        order[lo:hi] = span
+        axes[mid] = axis
+        place(lo, mid)
+        place(mid + 1, hi)
+
+    place(0, count)
+    palette_lab = lab
+    lab_tree_order = array("H", order)
+    lab_tree_axis = axes
+    lab_tree_min = box_min
+    lab_tree_max = box_max
+    depth = 1
+    while (1 << depth) <= count:
+        depth += 1
+    lab_stack_lo = array("H", [0] * (depth + 2))
+    lab_stack_hi = array("H", [0] * (depth + 2))
+
+
+def set_naming_mode(mode: str):
+    """Select "rgb" (squared RGB distance) or "lab" (Delta E 2000) color naming."""
+    global naming_mode
+    if mode not in (NAMING_RGB, NAMING_LAB):
+        print(f"[color_utils] Unknown color naming mode {mode!r}, using {NAMING_RGB!r}")
+        mode = NAMING_RGB
+    naming_mode = mode
+    if mode == NAMING_LAB and len(palette_lab) != len(kd_rgb):
+        build_lab_palette()
+
+
+def lab_nearest(r: int, g: int, b: int, want_second: bool = False) -> int:
+    """Return the palette index perceptually closest to (r, g, b).
+
+    A k-d tree search over the Lab palette finds the LAB_CANDIDATES entries
+    closest by Delta E 76, skipping any subtree whose bounding box is
+    farther than the worst candidate so far, and only those are ranked with
+    Delta E 2000. The best and second best index and squared Delta E 2000
+    are left in lab_result.
+    """
+    lab = palette_lab
+    index = kd_index
+    order = lab_tree_order
+    axes = lab_tree_axis
+    box_min = lab_tree_min
+    box_max = lab_tree_max
+    stack_lo = lab_stack_lo
+    stack_hi = lab_stack_hi
+    cand_index = lab_candidate_index
+    cand_dist = lab_candidate_dist
+    name_ids = palette_name_ids
+    l1, a1, b1 = rgb_to_lab(r, g, b)
+
+    kept = 0
+    worst = 1e30
+    stack_lo[0] = 0
+    stack_hi[0] = len(order)
+    sp = 1 if len(order) else 0
+    while sp:
+        sp -= 1
+        lo = stack_lo[sp]
+        hi = stack_hi[sp]
+        mid = (lo + hi) >> 1
+        j = 3 * mid
+        if kept == LAB_CANDIDATES:
+            # Squared distance to the subtree's bounding box
+            bound = 0.0
+            d = box_min[j] - l1
+            if d > 0:
+                bound += d * d
+            else:
+                d = l1 - box_max[j]
+                if d > 0:
+                    bound += d * d
+            d = box_min[j + 1] - a1
+            if d > 0:
+                bound += d * d
+            else:
+                d = a1 - box_max[j + 1]
+                if d > 0:
+                    bound += d * d
+            d = box_min[j + 2] - b1
+            if d > 0:
+                bound += d * d
+            else:
+                d = b1 - box_max[j + 2]
+                if d > 0:
+                    bound += d * d
+            if bound > worst:
+                continue
+        n = order[mid]
+        j = 3 * n
+        dl = l1 - lab[j]
+        da = a1 - lab[j + 1]
+        db = b1 - lab[j + 2]
+        dist = dl * dl + da * da + db * db
+        if kept < LAB_CANDIDATES or dist < worst:
+            # Insertion into the short sorted candidate list
+            k = kept if kept < LAB_CANDIDATES else LAB_CANDIDATES - 1
+            while k > 0 and cand_dist[k - 1] > dist:
+                cand_dist[k] = cand_dist[k - 1]
+                cand_index[k] = cand_index[k - 1]
+                k -= 1
+            cand_dist[k] = dist
+            cand_index[k] = n
+            if kept < LAB_CANDIDATES:
+                kept += 1
+            worst = cand_dist[kept - 1] if kept == LAB_CANDIDATES else 1e30
+
+        axis = axes[mid]
+        diff = dl if axis == 0 else da if axis == 1 else db
+        # Push the far side first so the near side is searched first
+        if diff > 0:
+            if lo < mid:
+                stack_lo[sp] = lo
+                stack_hi[sp] = mid
+                sp += 1
+            if mid + 1 < hi:
+                stack_lo[sp] = mid + 1
+                stack_hi[sp] = hi
+                sp += 1
+        else:
+            if mid + 1 < hi:
+                stack_lo[sp] = mid + 1
+                stack_hi[sp] = hi
+                sp += 1
+            if lo < mid:
+                stack_lo[sp] = lo
+                stack_hi[sp] = mid
+                sp += 1
+
+    best_index = second_index = NO_INDEX
+    best_dist = second_dist = 1e30
+    for k in range(kept):
+        n = cand_index[k]
+        j = 3 * n
+        de = delta_e2000(l1, a1, b1, lab[j], lab[j + 1], lab[j + 2])
+        dist = de * de
+        i = index[n]
+        if dist < best_dist or (dist == best_dist and i < best_index):
+            if best_index != NO_INDEX and name_ids[i] != name_ids[best_index]:
+                second_dist = best_dist
+                second_index = best_index
+            best_dist = dist
+            best_index = i
+        elif (want_second and name_ids[i] != name_ids[best_index]
+                and (dist < second_dist or (dist == second_dist and i < second_index))):
+            second_dist = dist
+            second_index = i
+
+    lab_result[0] = best_index
+    lab_result[1] = best_dist
+    lab_result[2] = second_index
+    lab_result[3] = second_dist
+    return best_index
+
+
+# === Neighbor graph for incremental lookups ===
+NEIGHBOR_GRAPH_FILE = "named_colors.adj"
+NEIGHBOR_GRAPH_MAGIC = b"NCNG"
+NEIGHBOR_GRAPH_VERSION = 1
+NEIGHBOR_GRAPH_HEADER = "<4sBHII"  # magic, version, palette count, checksum, neighbor words
+
+# Compressed adjacency: the neighbors of palette index i are
+# neighbor_list[neighbor_start[i]:neighbor_start[i + 1]]
+neighbor_start = None
+neighbor_list = None
+
+
+def load_neighbor_graph(path: str = NEIGHBOR_GRAPH_FILE) -> bool:
+    """Load the palette adjacency graph built by tools/build_neighbor_graph.py.
+
+    Returns False (and leaves NameTracker doing full searches) when the file is
+    missing, was built from a different palette, is truncated, or doesn't fit
+    in memory.
+    """
+    global neighbor_start, neighbor_list
+    try:
+        with open(path, "rb") as f:
+            header = f.read(struct.calcsize(NEIGHBOR_GRAPH_HEADER))
+            if len(header) != struct.calcsize(NEIGHBOR_GRAPH_HEADER):
+                print(f"[color_utils] {path} is truncated, ignoring")
+                return False
+            magic, version, count, checksum, words = struct.unpack(NEIGHBOR_GRAPH_HEADER, header)
+            if magic != NEIGHBOR_GRAPH_MAGIC or version != NEIGHBOR_GRAPH_VERSION:
+                print(f"[color_utils] {path} is not a v{NEIGHBOR_GRAPH_VERSION} neighbor graph, ignoring")
+                return False
+            if count != len(palette_name_offsets) or checksum != palette_checksum():
+                print(f"[color_utils] {path} was built for another palette, ignoring")
+                return False
+            start = array("H", bytes(2 * (count + 1)))
+            neighbors = array("H", bytes(2 * words))
+            if (f.readinto(start) != 2 * (count + 1) or f.readinto(neighbors) != 2 * words
+                    or start[count] != words):
+                print(f"[color_utils] {path} is truncated, ignoring")
+                return False
+    except OSError:
+        return False
+    except MemoryError:
+        start = neighbors = None
+        print(f"[color_utils] not enough memory for {path}, ignoring")
+        return False
+    neighbor_start = start
+    neighbor_list = neighbors
+    return True
+
+
+class NameTracker:
+    """Closest palette color search that follows a slowly moving color.
+
+    Each lookup starts from the previous answer and walks the neighbor graph
+    to any neighbor that is closer (ties going to the lower index) until none
+    is. The graph contains every pair of colors whose Voronoi cells touch
+    inside the RGB cube, so the walk always ends on the true closest color.
+    Without a graph, or after the palette changed, it falls back to
+    nearest_search.
+    """
+
+    def __init__(self):
+        self.index = NO_INDEX
+        self.generation = -1
+        self.lookups = 0
+        self.fallbacks = 0
+        self.distance_checks = 0
+
+    def nearest(self, r: int, g: int, b: int) -> int:
+        """Return the palette index closest to (r, g, b)."""
+        self.lookups += 1
+        current = self.index
+        start = neighbor_start
+        if start is None or current == NO_INDEX or self.generation != palette_generation:
+            self.fallbacks += 1
+            current = nearest_search(r, g, b)
+            self.index = current
+            self.generation = palette_generation
+            return current
+
+        rgb = palette_rgb
+        neighbors = neighbor_list
+        j = 3 * current
+        dr = r - rgb[j]
+        dg = g - rgb[j + 1]
+        db = b - rgb[j + 2]
+        best_dist = dr * dr + dg * dg + db * db
+        checks = 1
+        moved = True
+        while moved:
+            moved = False
+            for k in range(start[current], start[current + 1]):
+                i = neighbors[k]
+                j = 3 * i
+                dr = r - rgb[j]
+                dg = g - rgb[j + 1]
+                db = b - rgb[j + 2]
+                dist = dr * dr + dg * dg + db * db
+                checks += 1
+                if dist < best_dist or (dist == best_dist and i < current):
+                    best_dist = dist
+                    current = i
+                    moved = True
+        self.distance_checks += checks
+        self.index = current
+        return current
+
+
+def palette_size() -> int:
+    """Return the number of entries in the palette."""
+    return len(palette_name_offsets)
+
+
+def palette_name(index: int) -> str:
+    """Return the name of the palette entry at index, decoded from the name table."""
+    offset = palette_name_offsets[index]
+    return str(palette_names[offset + 1:offset + 1 + palette_names[offset]], "utf-8")
+
+
+def _index_palette(lut_path: str = None, graph_path: str = None):
+    """Rebuild every search structure after palette_rgb / palette_names changed."""
+    global palette_name_ids, name_lut_cells, name_lut_candidates, nearest_search, neighbor_start, neighbor_list, palette_generation
+    names = palette_names
+    offsets = palette_name_offsets
+    name_ids = array("H", [0] * len(offsets))
+    for i in range(1, len(offsets)):
+        a = offsets[i - 1]
+        b = offsets[i]
+        same = names[a] == names[b] and names[a + 1:a + 1 + names[a]] == names[b + 1:b + 1 + names[b]]
+        name_ids[i] = name_ids[i - 1] if same else i
+    palette_name_ids = name_ids
+    palette_generation += 1
+    name_lut_cells = name_lut_candidates = None
+    neighbor_start = neighbor_list = None
+    build_kd_tree()
+    nearest_search = kd_nearest if len(kd_index) >= KD_TREE_MIN_COLORS else linear_nearest
+    if naming_mode == NAMING_LAB:
+        build_lab_palette()
+    if lut_path:
+        load_name_lut(lut_path)
+    if graph_path:
+        load_neighbor_graph(graph_path)
+
+
+def set_palette(colors: list, lut_path: str = None, graph_path: str = None):
+    """Install a list of {"name", "rgb"} dicts as the palette and rebuild the search structures.
+
+    Palettes of any size can be swapped in at runtime. Small palettes are
+    scanned linearly, larger ones go through the k-d tree. The LUT and neighbor
+    graph are only used if lut_path / graph_path were built for this exact palette.
+    """
+    global palette_rgb, palette_names, palette_name_offsets
+    # Keep the palette in name order so that walking it by index breaks distance
+    # ties the same way sorting (distance, name) tuples does.
+    colors = sorted(colors, key=lambda color: color["name"])
+    names = bytearray()
+    offsets = array("H")
+    for color in colors:
+        encoded = color["name"].encode()
+        offsets.append(len(names))
+        names.append(len(encoded))
+        names.extend(encoded)
+    palette_rgb = bytearray(c for color in colors for c in color["rgb"])
+    palette_names = names
+    palette_name_offsets = offsets
+    _index_palette(lut_path, graph_path)
+
+
+def load_palette_binary(path: str = NAMED_COLORS_FILE, lut_path: str = NAME_LUT_FILE,
+                        graph_path: str = NEIGHBOR_GRAPH_FILE):
+    """Load a palette compiled by tools/build_palette.py.
+
+    The file holds a header, the packed r, g, b bytes, a uint16 name offset per
+    entry and the length-prefixed name table. Each block is read straight into
+    a preallocated buffer; names are only decoded when palette_name asks.
+    """
+    global palette_rgb, palette_names, palette_name_offsets
+    with open(path, "rb") as f:
+        header = f.read(struct.calcsize(PALETTE_HEADER))
+        if len(header) != struct.calcsize(PALETTE_HEADER):
+            raise ValueError(f"{path} is truncated")
+        magic, version, count, names_size = struct.unpack(PALETTE_HEADER, header)
+        if magic != PALETTE_MAGIC or version != PALETTE_VERSION:
+            raise ValueError(f"{path} is not a v{PALETTE_VERSION} palette file")
+        rgb = bytearray(3 * count)
+        offsets = array("H", bytes(2 * count))
+        names = bytearray(names_size)
+        if f.readinto(rgb) != len(rgb) or f.readinto(offsets) != 2 * count or f.readinto(names) != names_size:
+            raise ValueError(f"{path} is truncated")
+    palette_rgb = rgb
+    palette_names = names
+    palette_name_offsets = offsets
+    _index_palette(lut_path, graph_path)
+
+
+def save_palette_binary(path: str = NAMED_COLORS_FILE):
+    """Write the current palette in the format load_palette_binary reads."""
+    offsets = array("H", palette_name_offsets)
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    with open(path, "wb") as f:
+        f.write(struct.pack(PALETTE_HEADER, PALETTE_MAGIC, PALETTE_VERSION, len(offsets), len(palette_names)))
+        f.write(palette_rgb)
+        f.write(bytes(offsets))
+        f.write(palette_names)
+
+
+def load_palette(path: str = NAMED_COLORS_FILE, lut_path: str = NAME_LUT_FILE,
+                 graph_path: str = NEIGHBOR_GRAPH_FILE):
+    """Load a named color palette, compiled (.bin) or JSON, and rebuild the search structures."""
+    if path.endswith(".json"):
+        with open(path) as f:
+            set_palette(json.load(f), lut_path, graph_path)
+    else:
+        load_palette_binary(path, lut_path, graph_path)
+
+
+# The name LUT is opt-in (load_name_lut), see the "name_lut" setting
+try:
+    load_palette(lut_path=None)
+except (OSError, ValueError):
+    # No compiled palette on the board yet (or a stale or truncated one), fall back to the JSON source
+    load_palette(NAMED_COLORS_JSON_FILE, lut_path=None)
 
 
 def is_light_color(r: int, g: int, b: int) -> bool:
@@ -28,28 +824,34 @@ def rgb_to_hex(r: int, g: int, b: int) -> str:
     """Convert RGB values to a hex color string."""
     return f"#{r:02x}{g:02x}{b:02x}"
 
-def closest_named_color(r: int, g: int, b: int, blend_threshold: float = 0.25, show_two_colors=False, show_hex = True) -> str:
-    """Return the closest named color from named_colors_raw."""
-    distances = sorted(
-        (
-            (r - color["rgb"][0])**2 +
-            (g - color["rgb"][1])**2 +
-            (b - color["rgb"][2])**2,
-            color["name"]
-        )
-        for color in named_colors_raw
-    )
-    closest_dist, closest_name = distances[0]
-    second_dist, second_name = distances[1]
+def closest_named_color(r: int, g: int, b: int, blend_threshold: float = 0.25, show_two_colors=False, show_hex = True, exact = True, tracker = None) -> str:
+    """Return the closest named color in the palette.
+
+    Single-name lookups go through the precomputed LUT when one is loaded;
+    exact=False skips the refinement of LUT cells that sit on a color boundary.
+    Everything else is answered by nearest_search (linear scan or k-d tree),
+    which only tracks a runner-up when show_two_colors needs one, or by the
+    optional NameTracker when only the closest name is wanted. In "lab"
+    naming mode colors are matched by Delta E 2000 instead (see set_naming_mode).
+    """
     if r == 0 and g == 0 and b == 0:
         name = "black"
-    # if v = 0
-    elif not show_two_colors:
-        name = closest_name
-    elif closest_dist == 0:
-        name = closest_name
-    elif second_dist / closest_dist < (1 + blend_threshold):
-        name = f"{closest_name} with {second_name}"
+    elif naming_mode == NAMING_RGB and not show_two_colors and name_lut_cells is not None:
+        name = palette_name(lut_color_index(r, g, b, exact))
+    elif naming_mode == NAMING_RGB and not show_two_colors and tracker is not None:
+        name = palette_name(tracker.nearest(r, g, b))
+    else:
+        if naming_mode == NAMING_LAB:
+            result = lab_result
+            name = palette_name(lab_nearest(r, g, b, show_two_colors))
+        else:
+            result = nearest_result
+            name = palette_name(nearest_search(r, g, b, show_two_colors))
+        closest_dist = result[1]
+        second_dist = result[3]
+        if (show_two_colors and closest_dist != 0 and result[2] != NO_INDEX
+                and second_dist / closest_dist < (1 + blend_threshold)):
+            name = f"{name} with {palette_name(result[2])}"
     if show_hex:
         hex_color = rgb_to_hex(r, g, b)
         name = f"{name} ({hex_color})"
@@ -87,4 +889,74 @@ def hsv_to_rgb(h: float, s: float, v: float) -> tuple:
     if i == 4:
         return t, p, v
     if i == 5:
-        return v, p, q
\ No newline at end of file
+        return v, p, q
+
+
+class LRUCache:
+    """Small bounded least-recently-used cache with hit/miss counters.
+
+    Written against plain dicts so it behaves the same on CircuitPython,
+    whose dicts do not keep insertion order. Eviction scans the entries, which
+    is fine for the few dozen entries it is meant for.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.entries = {}  # key -> [value, last used tick]
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        entry[1] = self.clock
+        return entry[0]
+
+    def put(self, key, value):
+        entries = self.entries
+        if key not in entries and len(entries) >= self.capacity:
+            oldest = min(entries, key=lambda k: entries[k][1])
+            del entries[oldest]
+        self.clock += 1
+        entries[key] = [value, self.clock]
+
+
+class ColorNamer:
+    """Names a mixed color for the screen, doing as little work as the color allows.
+
+    update() returns the (name, text color, label scale) entry for a color,
+    or None when it is the same color as the previous call. Entries are
+    kept in an LRU cache keyed by the packed 24-bit color; misses go through
+    closest_named_color with a NameTracker, which is only consulted when no
+    name LUT is loaded.
+    """
+
+    def __init__(self, cache_size: int = 64):
+        self.cache = LRUCache(cache_size)
+        self.tracker = NameTracker()
+        self.last_packed = None
+        self.skips = 0
+
+    def update(self, r: int, g: int, b: int):
+        packed = (r << 16) | (g << 8) | b
+        if packed == self.last_packed:
+            self.skips += 1
+            return None
+        self.last_packed = packed
+        entry = self.cache.get(packed)
+        if entry is None:
+            name = closest_named_color(r, g, b, tracker=self.tracker)
+            entry = (name, 0x000000 if is_light_color(r, g, b) else 0xFFFFFF, 1 if len(name) > 26 else 2)
+            self.cache.put(packed, entry)
+        return entry
+
+    def stats(self) -> str:
+        cache = self.cache
+        tracker = self.tracker
+        return (f"name cache {cache.hits} hits / {cache.misses} misses, {self.skips} unchanged frames, "
+                f"tracker {tracker.lookups} lookups / {tracker.fallbacks} full searches")
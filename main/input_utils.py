@@ -0,0 +1,748 @@
+# === Encoder Input Helpers ===
+# Every seesaw read is a register write, a settle delay and a read, so polling
+# four boards each loop keeps the I2C bus busy even when nothing moves. The
+# boards can pull a shared, open-drain INT line low when their encoder turns or
+# a watched button pin changes; EncoderInput watches that line and tells the
+# menus when reading the boards is worthwhile.
+
+import struct
+import time
+from array import array
+
+# Seesaw register addresses (module base, register)
+_GPIO_BASE = 0x01
+_GPIO_BULK = 0x04
+_GPIO_INTFLAG = 0x0A
+_ENCODER_BASE = 0x11
+_ENCODER_DELTA = 0x40
+
+# Input event kinds; value is the detent delta for EVENT_ROTATE, 0 otherwise
+EVENT_ROTATE = 0
+EVENT_PRESS = 1
+EVENT_RELEASE = 2
+EVENT_LONG_PRESS = 3
+EVENT_DOUBLE_CLICK = 4
+EVENT_NAMES = ("rotate", "press", "release", "long_press", "double_click")
+
+# Seconds between fallback polls when the boards' INT line is watched
+DEFAULT_INT_POLL_INTERVAL = 0.5
+
+# Encoder trace files: a header, then one record per read that turned a knob
+# or saw the button change. Times are ms since the trace started.
+TRACE_MAGIC = b"ENCT"
+TRACE_VERSION = 1
+TRACE_HEADER = "<4sB"   # magic, version
+TRACE_RECORD = "<IBhB"  # ms, address, delta, button flags
+TRACE_PRESSED = 0x01    # Button level at the read
+TRACE_EDGE = 0x02       # The board latched a button change, e.g. a tap shorter than one read
+
+
+class I2CStats:
+    """Counts I2C bus transactions made through CountingI2C."""
+
+    def __init__(self):
+        self.transactions = 0
+        self.started_at = time.monotonic_ns()
+
+    def rate(self) -> float:
+        """Return transactions per second since startup, like the other stats."""
+        elapsed = time.monotonic_ns() - self.started_at
+        return self.transactions * 1_000_000_000 / elapsed if elapsed else 0.0
+
+
+I2C_STATS = I2CStats()
+
+
+class CountingI2C:
+    """Wraps a busio.I2C bus and records each transfer in I2C_STATS.
+
+    A seesaw register read is two transfers (address write, data read), a
+    register write is one.
+    """
+
+    def __init__(self, i2c):
+        self.i2c = i2c
+
+    def __getattr__(self, name):
+        return getattr(self.i2c, name)
+
+    def writeto(self, address, buffer, **kwargs):
+        I2C_STATS.transactions += 1
+        return self.i2c.writeto(address, buffer, **kwargs)
+
+    def readfrom_into(self, address, buffer, **kwargs):
+        I2C_STATS.transactions += 1
+        return self.i2c.readfrom_into(address, buffer, **kwargs)
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, **kwargs):
+        I2C_STATS.transactions += 1
+        return self.i2c.writeto_then_readfrom(address, buffer_out, buffer_in, **kwargs)
+
+
+class I2CBusManager:
+    """Tracks which I2C devices answer, reconnects the ones that don't, and measures each address.
+
+    scan() lists the bus once at boot. want() registers a device by address
+    with a connect() callback that opens it (and may raise) and a
+    disconnect() callback for when it stops answering. A device that is
+    missing or fails `fail_limit` times in a row is probed again from
+    update() with exponential backoff between `retry_min` and `retry_max`
+    seconds, and connected as soon as it answers.
+
+    record() keeps per-address operation counts, errors and latency.
+    """
+
+    def __init__(self, i2c, retry_min: float = 0.5, retry_max: float = 30.0, fail_limit: int = 3):
+        self.i2c = i2c
+        self.retry_min_ns = int(retry_min * 1_000_000_000)
+        self.retry_max_ns = int(retry_max * 1_000_000_000)
+        self.fail_limit = fail_limit
+        self.found = ()
+        self.devices = {}  # address -> [connect, disconnect, connected, next_retry, backoff]
+        self.health = {}   # address -> [ops, errors, consecutive errors, total ns, max ns]
+
+    def scan(self) -> tuple:
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.found = tuple(self.i2c.scan())
+        finally:
+            self.i2c.unlock()
+        return self.found
+
+    def probe(self, address: int) -> bool:
+        """Return True if a device acknowledges at address."""
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto(address, b"")
+            return True
+        except OSError:
+            return False
+        finally:
+            self.i2c.unlock()
+
+    def want(self, address: int, connect, disconnect):
+        """Register a device, connecting it now if the boot scan found it."""
+        self.devices[address] = [connect, disconnect, False, 0, self.retry_min_ns]
+        self.health.setdefault(address, [0, 0, 0, 0, 0])
+        if address in self.found:
+            self._connect(address, time.monotonic_ns())
+        else:
+            print(f"[i2c] {hex(address)} not found, retrying in the background")
+            self.devices[address][3] = time.monotonic_ns() + self.retry_min_ns
+
+    def _connect(self, address: int, now: int):
+        device = self.devices[address]
+        try:
+            device[0]()
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"[i2c] {hex(address)} failed to connect - {e}")
+            device[3] = now + device[4]
+            device[4] = min(device[4] * 2, self.retry_max_ns)
+            return
+        device[2] = True
+        device[4] = self.retry_min_ns
+        self.health[address][2] = 0
+
+    def update(self):
+        """Probe devices whose retry time has come."""
+        now = time.monotonic_ns()
+        for address, device in self.devices.items():
+            if device[2] or now < device[3]:
+                continue
+            if self.probe(address):
+                print(f"[i2c] {hex(address)} answered, connecting")
+                self._connect(address, now)
+            else:
+                device[3] = now + device[4]
+                device[4] = min(device[4] * 2, self.retry_max_ns)
+
+    def record(self, address: int, elapsed_ns: int, ok: bool):
+        """Count one operation on address; too many failures in a row disconnect it."""
+        health = self.health.get(address)
+        if health is None:
+            health = self.health[address] = [0, 0, 0, 0, 0]
+        health[0] += 1
+        health[3] += elapsed_ns
+        if elapsed_ns > health[4]:
+            health[4] = elapsed_ns
+        if ok:
+            health[2] = 0
+            return
+        health[1] += 1
+        health[2] += 1
+        device = self.devices.get(address)
+        if device and device[2] and health[2] >= self.fail_limit:
+            print(f"[i2c] {hex(address)} stopped answering, retrying in the background")
+            device[2] = False
+            device[3] = time.monotonic_ns() + self.retry_min_ns
+            device[4] = self.retry_min_ns
+            device[1]()
+
+    def stats(self) -> str:
+        parts = []
+        for address, (ops, errors, _, total_ns, max_ns) in self.health.items():
+            state = "up" if self.devices.get(address, (0, 0, False))[2] else "down"
+            average = total_ns / ops / 1000 if ops else 0
+            parts.append(f"{hex(address)} {state} {errors}/{ops} err {average:.0f}/{max_ns / 1000:.0f}us")
+        return "i2c " + ", ".join(parts)
+
+
+class SeesawEncoder:
+    """One seesaw rotary encoder board, read with as few register reads as possible.
+
+    read() fetches the encoder delta register, which the board resets as it
+    is read, so the position never has to be written back; range clamping
+    is left to the caller. The button level comes from the same frame's
+    GPIO read: the bulk input register when polling, or, with interrupts
+    enabled, the interrupt flag register (which also releases the INT
+    line) and the bulk register only when the button pin changed. The
+    button is wired with a pull-up, so `pressed` is true while it reads low.
+    """
+
+    def __init__(self, seesaw, button_pin: int, interrupts: bool = False, read_delay: float = 0.008):
+        self.seesaw = seesaw
+        self.button_byte = 3 - button_pin // 8
+        self.button_bit = 1 << (button_pin % 8)
+        self.interrupts = interrupts
+        self.read_delay = read_delay
+        self.on_bus = True
+        self.buf = bytearray(4)
+        self.pressed = False
+        self.button_edge = False  # The interrupt flag saw the button change since the last read
+        self.read_button()
+
+    def read_button(self):
+        self.seesaw.read(_GPIO_BASE, _GPIO_BULK, self.buf, self.read_delay)
+        self.pressed = not self.buf[self.button_byte] & self.button_bit
+
+    def read(self) -> int:
+        """Return the position change since the last read and refresh `pressed`."""
+        buf = self.buf
+        self.seesaw.read(_ENCODER_BASE, _ENCODER_DELTA, buf, self.read_delay)
+        delta = struct.unpack_from(">i", buf)[0]
+        if self.interrupts:
+            self.seesaw.read(_GPIO_BASE, _GPIO_INTFLAG, buf, self.read_delay)
+            self.button_edge = bool(buf[self.button_byte] & self.button_bit)
+            if self.button_edge:
+                self.read_button()
+        else:
+            self.read_button()
+        return delta
+
+
+# Detents a real turn can show beyond glitch_rate * elapsed in a single read
+_GLITCH_SLACK = 2
+
+
+class EncoderAccelerator:
+    """Scales encoder detents by how fast the knob is spinning.
+
+    apply() records each read's detent count with its timestamp and
+    measures velocity (detents per second) from the time between detents:
+    the detents read since an earlier read, over the time since that read,
+    looking back until the span reaches `window` seconds. A lone detent
+    after a pause therefore measures the pause, not one detent per window.
+    The gain ramps from 1 at `slow_rate` to `max_gain` at `fast_rate`,
+    shaped by `exponent`, so turns at or below `slow_rate` move exactly one
+    step per detent and a fast spin covers the range quickly. Fractions of
+    a step carry over to the next accelerated read in the same direction.
+
+    Glitches are told apart by timing: a read is rejected (and counted in
+    `glitches`) when it reports more detents than the knob could turn at
+    `glitch_rate` in the time since the previous read, capped at one
+    window, plus a small slack.
+    """
+
+    def __init__(self, window: float = 0.1, slow_rate: float = 5, fast_rate: float = 40,
+                 max_gain: float = 6.0, exponent: float = 2.0, glitch_rate: float = 300, history: int = 8):
+        self.window_ns = int(window * 1_000_000_000)
+        self.slow_rate = slow_rate
+        self.fast_rate = fast_rate
+        self.max_gain = max_gain
+        self.exponent = exponent
+        self.glitch_rate = glitch_rate
+        self.times = [0] * history
+        self.counts = [0] * history
+        self.next = 0
+        self.filled = 0
+        self.last_read = None
+        self.remainder = 0.0
+        self.velocity = 0.0
+        self.glitches = 0
+
+    def gain(self, velocity: float) -> float:
+        if velocity <= self.slow_rate or self.max_gain <= 1:
+            return 1.0
+        t = min(1.0, (velocity - self.slow_rate) / (self.fast_rate - self.slow_rate))
+        return 1.0 + (self.max_gain - 1.0) * pow(t, self.exponent)
+
+    def apply(self, delta: int, now: int) -> int:
+        """Return the accelerated step count for delta detents read at time now (ns)."""
+        last = self.last_read
+        self.last_read = now
+        if not delta:
+            return 0
+
+        elapsed = self.window_ns if last is None else min(now - last, self.window_ns)
+        detents = abs(delta)
+        if detents > self.glitch_rate * elapsed / 1_000_000_000 + _GLITCH_SLACK:
+            self.glitches += 1
+            return 0
+
+        # Walk back through earlier detent reads, newest first
+        history = len(self.times)
+        recent = detents
+        velocity = 0.0
+        i = self.next
+        for _ in range(self.filled):
+            i = (i - 1) % history
+            span = now - self.times[i]
+            if span > 0:
+                velocity = recent * 1_000_000_000 / span
+            if span >= self.window_ns:
+                break
+            recent += self.counts[i]
+        self.velocity = velocity
+        self.times[self.next] = now
+        self.counts[self.next] = detents
+        self.next = (self.next + 1) % history
+        self.filled = min(self.filled + 1, history)
+
+        gain = self.gain(velocity)
+        if gain == 1.0:
+            self.remainder = 0.0  # Slow turns step exactly once per detent
+            return delta
+        if (delta > 0) != (self.remainder > 0):
+            self.remainder = 0.0  # Direction changed, drop the carried fraction
+        step = delta * gain + self.remainder
+        whole = int(step)
+        self.remainder = step - whole
+        return whole
+
+
+def knob_value(position: int, steps: int, sensitivity: int = 1, max_value: int = 255) -> int:
+    """Return a channel value moved by accelerated encoder steps, clamped on the host.
+
+    Turning the knob clockwise (positive steps) lowers the value.
+    """
+    return max(0, min(max_value, position - steps * sensitivity))
+
+
+class EventQueue:
+    """Fixed-size FIFO of timestamped input events.
+
+    Events are stored in preallocated arrays; pop() returns a
+    (kind, source, value, timestamp) tuple, source being the encoder's I2C
+    address. When full, the oldest event is dropped and counted.
+    """
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self.kinds = bytearray(capacity)
+        self.sources = bytearray(capacity)
+        self.values = array("l", [0] * capacity)
+        self.times = [0] * capacity
+        self.head = 0
+        self.count = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, kind: int, source: int, value: int, timestamp: int):
+        if self.count == self.capacity:
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+            self.dropped += 1
+        i = (self.head + self.count) % self.capacity
+        self.kinds[i] = kind
+        self.sources[i] = source
+        self.values[i] = value
+        self.times[i] = timestamp
+        self.count += 1
+
+    def pop(self) -> tuple:
+        i = self.head
+        self.head = (i + 1) % self.capacity
+        self.count -= 1
+        return self.kinds[i], self.sources[i], self.values[i], self.times[i]
+
+
+class ButtonDebouncer:
+    """Turns raw button samples into press, release, long-press and double-click events.
+
+    A new level is only accepted once it has held for `debounce` seconds;
+    the events carry the time of the edge that started it. tick() confirms
+    levels and fires long presses without needing new samples, since with
+    interrupts a board is only read when something changes. A press held
+    `long_press` seconds sends EVENT_LONG_PRESS (and its release is not
+    counted as a click); two clicks within `double_click` seconds send
+    EVENT_DOUBLE_CLICK after the second release. A latched edge whose level
+    already returned is a tap shorter than one read, and is sent as a
+    release and press (or press and release) pair. It only counts if the
+    previous reading came after the last accepted edge had finished
+    bouncing; otherwise the latch may just hold that edge's bounce.
+    """
+
+    def __init__(self, source: int, queue: EventQueue, debounce: float = 0.02,
+                 long_press: float = 0.6, double_click: float = 0.35):
+        self.source = source
+        self.queue = queue
+        self.debounce_ns = int(debounce * 1_000_000_000)
+        self.long_press_ns = int(long_press * 1_000_000_000)
+        self.double_click_ns = int(double_click * 1_000_000_000)
+        self.pressed = False       # Debounced level
+        self.candidate = False     # Last raw level seen
+        self.candidate_at = None   # When the raw level last changed, None when settled
+        self.pressed_at = 0
+        self.changed_at = 0        # Time of the last accepted edge
+        self.sampled_at = None     # Time of the previous reading
+        self.long_sent = False
+        self.last_click = None
+
+    def sample(self, pressed: bool, edge: bool, now: int):
+        """Feed one raw reading; edge means the board latched a change since the last one."""
+        self.tick(now)  # The previous level held at least until this reading
+        previous = self.sampled_at
+        self.sampled_at = now
+        if pressed != self.candidate:
+            self.candidate = pressed
+            self.candidate_at = now if pressed != self.pressed else None
+        elif (edge and self.candidate_at is None
+              and (previous is None or previous - self.changed_at > self.debounce_ns)):
+            self._set(not pressed, now)
+            self._set(pressed, now)
+
+    def tick(self, now: int):
+        """Confirm a settled level and fire a due long press."""
+        if self.candidate_at is not None and now - self.candidate_at >= self.debounce_ns:
+            at = self.candidate_at
+            self.candidate_at = None
+            self._set(self.candidate, at)
+        if self.pressed and not self.long_sent and now - self.pressed_at >= self.long_press_ns:
+            self.long_sent = True
+            self.queue.push(EVENT_LONG_PRESS, self.source, 0, now)
+
+    def _set(self, pressed: bool, at: int):
+        self.pressed = pressed
+        self.changed_at = at
+        if pressed:
+            self.pressed_at = at
+            self.long_sent = False
+            self.queue.push(EVENT_PRESS, self.source, 0, at)
+            return
+        self.queue.push(EVENT_RELEASE, self.source, 0, at)
+        if self.long_sent:
+            return
+        if self.last_click is not None and at - self.last_click <= self.double_click_ns:
+            self.last_click = None
+            self.queue.push(EVENT_DOUBLE_CLICK, self.source, 0, at)
+        else:
+            self.last_click = at
+
+
+class EncoderInput:
+    """Reads the encoder boards when worthwhile and queues what happened as events.
+
+    With an interrupt line (a DigitalInOut on the shared seesaw INT pin),
+    attach() enables a board's encoder interrupt and the GPIO interrupt for
+    its button pin. update() samples the line: while it is low some board
+    has news, and `pending` is set so every attached board is read (the
+    line is wired-OR, so it can't tell which one). Reading a board through
+    its SeesawEncoder releases the line. As a fallback for missed edges, or
+    when there is no line, `pending` is also set every `poll_interval`
+    seconds; 0 polls on every loop. Left at None it is 0 without a line
+    and DEFAULT_INT_POLL_INTERVAL with one, so the line actually saves reads.
+
+    Each read pushes an EVENT_ROTATE for a non-zero delta and feeds the
+    board's ButtonDebouncer; `events` is the queue the menus consume.
+    Boards are keyed by I2C address, so re-attaching one replaces it.
+    """
+
+    def __init__(self, int_line=None, poll_interval: float = None, read_delay: float = 0.008,
+                 button_timing: dict = None, clock=time.monotonic_ns):
+        self.clock = clock  # Returns the time in ns; a VirtualClock when replaying on a host
+        if poll_interval is None:
+            poll_interval = DEFAULT_INT_POLL_INTERVAL if int_line is not None else 0
+        self.poll_interval_ns = int(poll_interval * 1_000_000_000)
+        self.read_delay = read_delay
+        self.int_line = int_line
+        self.button_timing = button_timing or {}
+        self.bus = None  # I2CBusManager that records board reads and failures
+        self.recorder = None  # TraceRecorder that logs every read with news
+        self.events = EventQueue()
+        self.devices = {}
+        self.pending = True
+        self.last_poll = clock()
+        self.loops = 0
+        self.interrupt_loops = 0
+        self.poll_loops = 0
+
+    def attach(self, seesaw, button_pin: int, address: int) -> SeesawEncoder:
+        """Enable the interrupts of one seesaw encoder board and start reading it."""
+        interrupts = self.int_line is not None
+        if interrupts:
+            seesaw.enable_encoder_interrupt()
+            seesaw.set_GPIO_interrupts(1 << button_pin, True)
+        return self.add(address, SeesawEncoder(seesaw, button_pin, interrupts, self.read_delay))
+
+    def add(self, address: int, reader):
+        """Start reading any object with read(), `pressed` and `button_edge` as the board at address."""
+        timing = self.button_timing
+        debouncer = ButtonDebouncer(
+            address, self.events,
+            debounce=timing.get("debounce", 0.02),
+            long_press=timing.get("long_press", 0.6),
+            double_click=timing.get("double_click", 0.35)
+        )
+        self.devices[address] = (reader, debouncer)
+        return reader
+
+    def update(self):
+        """Read the boards if anything signalled or a poll is due, then run the button timers."""
+        self.loops += 1
+        now = self.clock()
+        if self.int_line is not None and not self.int_line.value:
+            self.pending = True
+            self.interrupt_loops += 1
+        elif now - self.last_poll >= self.poll_interval_ns:
+            self.pending = True
+            self.poll_loops += 1
+            self.last_poll = now
+        else:
+            self.pending = False
+
+        for address, (reader, debouncer) in self.devices.items():
+            if self.pending:
+                if reader.on_bus:
+                    started = time.monotonic_ns()
+                    try:
+                        delta = reader.read()
+                    except (OSError, RuntimeError):
+                        self.bus.record(address, time.monotonic_ns() - started, False)
+                        continue
+                    self.bus.record(address, time.monotonic_ns() - started, True)
+                else:
+                    delta = reader.read()
+                if delta:
+                    self.events.push(EVENT_ROTATE, address, delta, now)
+                if self.recorder:
+                    self.recorder.record(now, address, delta, reader.pressed, reader.button_edge)
+                debouncer.sample(reader.pressed, reader.button_edge, now)
+            else:
+                debouncer.tick(now)
+
+    def stats(self) -> str:
+        idle = self.loops - self.interrupt_loops - self.poll_loops
+        return (f"encoders read on {self.interrupt_loops} interrupt / {self.poll_loops} poll loops, "
+                f"{idle} idle, i2c {I2C_STATS.rate():.0f} tx/s")
+
+
+class VirtualClock:
+    """A clock that only moves when told to, for deterministic replays.
+
+    Call it like time.monotonic_ns().
+    """
+
+    def __init__(self, start_ns: int = 0):
+        self.now_ns = start_ns
+
+    def __call__(self) -> int:
+        return self.now_ns
+
+    def advance(self, seconds: float):
+        self.now_ns += int(seconds * 1_000_000_000)
+
+
+class TraceRecorder:
+    """Logs encoder reads to a trace file, buffering `buffer_records` records per write.
+
+    Only reads that turned a knob, changed its button level or latched a
+    button edge (a tap shorter than one read) are kept, so an idle bus
+    costs nothing. Call flush() now and then, and close() at the end.
+    """
+
+    def __init__(self, path: str, buffer_records: int = 64, clock=time.monotonic_ns):
+        self.file = open(path, "wb")
+        self.file.write(struct.pack(TRACE_HEADER, TRACE_MAGIC, TRACE_VERSION))
+        self.started_at = clock()
+        self.size = struct.calcsize(TRACE_RECORD)
+        self.buf = bytearray(buffer_records * self.size)
+        self.used = 0
+        self.pressed = {}  # address -> button level last recorded
+        self.records = 0
+
+    def record(self, now: int, address: int, delta: int, pressed: bool, edge: bool = False):
+        if not delta and not edge and pressed == self.pressed.get(address, False):
+            return
+        self.pressed[address] = pressed
+        delta = max(-32768, min(32767, delta))
+        ms = (now - self.started_at) // 1_000_000
+        flags = (TRACE_PRESSED if pressed else 0) | (TRACE_EDGE if edge else 0)
+        struct.pack_into(TRACE_RECORD, self.buf, self.used, ms, address, delta, flags)
+        self.used += self.size
+        self.records += 1
+        if self.used == len(self.buf):
+            self.flush()
+
+    def flush(self):
+        if self.used:
+            self.file.write(memoryview(self.buf)[:self.used])
+            self.used = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class EncoderScript:
+    """What one encoder did over time: parallel arrays of ms, delta and button flags."""
+
+    def __init__(self):
+        self.times = array("I")
+        self.deltas = array("h")
+        self.flags = bytearray()  # TRACE_PRESSED | TRACE_EDGE
+
+    def append(self, ms: int, delta: int, pressed: bool, edge: bool = False):
+        self.times.append(ms)
+        self.deltas.append(delta)
+        self.flags.append((TRACE_PRESSED if pressed else 0) | (TRACE_EDGE if edge else 0))
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def duration(self) -> float:
+        return self.times[-1] / 1000 if self.times else 0.0
+
+
+def load_trace(path: str) -> dict:
+    """Read a trace file into an EncoderScript per encoder address."""
+    header_size = struct.calcsize(TRACE_HEADER)
+    size = struct.calcsize(TRACE_RECORD)
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version = struct.unpack_from(TRACE_HEADER, data, 0)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} encoder trace")
+    scripts = {}
+    # A trace cut short by a reset may end in a partial record; drop it
+    end = header_size + (len(data) - header_size) // size * size
+    for offset in range(header_size, end, size):
+        ms, address, delta, flags = struct.unpack_from(TRACE_RECORD, data, offset)
+        script = scripts.get(address)
+        if script is None:
+            script = scripts[address] = EncoderScript()
+        script.append(ms, delta, flags & TRACE_PRESSED, flags & TRACE_EDGE)
+    return scripts
+
+
+def save_trace(path: str, scripts: dict):
+    """Write EncoderScripts, e.g. from sweep_trace(), as a trace file ordered by time."""
+    records = []
+    for address, script in scripts.items():
+        for i in range(len(script)):
+            records.append((script.times[i], address, script.deltas[i], script.flags[i]))
+    records.sort()
+    with open(path, "wb") as f:
+        f.write(struct.pack(TRACE_HEADER, TRACE_MAGIC, TRACE_VERSION))
+        for record in records:
+            f.write(struct.pack(TRACE_RECORD, *record))
+
+
+def sweep_trace(addresses, seconds: float = 10.0, rate: float = 20.0, span: int = 64,
+                press_every: float = 2.0, hold: float = 0.1) -> dict:
+    """Build synthetic EncoderScripts: each knob sweeps back and forth across `span` detents.
+
+    Knobs turn one detent every 1/rate seconds, each starting a little later
+    than the previous one so their events interleave, and press their
+    button for `hold` seconds every `press_every` seconds (0 for never).
+    """
+    scripts = {}
+    step_ms = max(1, int(1000 / rate))
+    end_ms = int(seconds * 1000)
+    for n, address in enumerate(addresses):
+        script = scripts[address] = EncoderScript()
+        position = 0
+        direction = 1
+        ms = n * step_ms // max(1, len(addresses))
+        next_press = int(press_every * 1000) if press_every else end_ms + 1
+        release_at = None
+        while ms < end_ms:
+            if release_at is not None and ms >= release_at:
+                script.append(release_at, 0, False)
+                release_at = None
+            if ms >= next_press:
+                script.append(next_press, 0, True)
+                release_at = next_press + int(hold * 1000)
+                next_press += int(press_every * 1000)
+            if not 0 <= position + direction <= span:
+                direction = -direction
+            position += direction
+            script.append(ms, direction, release_at is not None)
+            ms += step_ms
+    return scripts
+
+
+class SimulatedEncoder:
+    """Stands in for a SeesawEncoder: holds a position, or replays an EncoderScript.
+
+    Without a script the position only changes when something sets it.
+    play() replays a script against `clock`: each read() applies the
+    records that have come due since the last one, so the reader sees the
+    same deltas, button levels and latched edges the real board reported.
+    """
+
+    def __init__(self, initial_position: int = 0):
+        self.position = initial_position
+        self.read_position = initial_position
+        self.pressed = False
+        self.button_edge = False
+        self.on_bus = False
+        self.script = None
+        self.clock = None
+        self.started_at = 0
+        self.next_record = 0
+
+    def play(self, script: EncoderScript, clock=time.monotonic_ns):
+        """Start replaying script, with its time 0 at the clock's current time."""
+        self.script = script
+        self.clock = clock
+        self.started_at = clock()
+        self.next_record = 0
+
+    def finished(self) -> bool:
+        return self.script is None or self.next_record >= len(self.script)
+
+    def read(self) -> int:
+        """Return the position change since the last read, like SeesawEncoder."""
+        script = self.script
+        if script is not None:
+            elapsed_ms = (self.clock() - self.started_at) // 1_000_000
+            was_pressed = self.pressed
+            latched = False
+            i = self.next_record
+            while i < len(script) and script.times[i] <= elapsed_ms:
+                flags = script.flags[i]
+                self.position += script.deltas[i]
+                self.pressed = flags & TRACE_PRESSED != 0
+                latched = latched or flags & TRACE_EDGE != 0
+                i += 1
+            self.next_record = i
+            self.button_edge = latched or self.pressed != was_pressed
+        delta = self.position - self.read_position
+        self.read_position = self.position
+        return delta
+
+
+def replay_trace(encoder_input: EncoderInput, scripts: dict, clock=time.monotonic_ns) -> list:
+    """Replace the readers at each scripted address with a SimulatedEncoder playing its script."""
+    players = []
+    for address, script in scripts.items():
+        player = SimulatedEncoder()
+        player.play(script, clock)
+        encoder_input.add(address, player)
+        players.append(player)
+    return players
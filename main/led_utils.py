@@ -0,0 +1,697 @@
+# === LED Trail Helpers ===
+import time
+from array import array
+from neopixel_write import neopixel_write
+from color_utils import hsv_to_rgb
+
+# Trail slot value that shows as an unlit pixel, past the 0-255 channel values
+TRAIL_OFF = 256
+_UNKNOWN = 0xFFFF
+# Dithered intensities are 8.8 fixed point; full scale stays below 0x10000
+# so adding the carried error never needs clamping.
+DITHER_FULL_SCALE = 255 << 8
+# Finest dithered fraction, 1/16 of a level. Levels are multiples of the
+# current step, so every on/off pattern repeats within 0x100 // step shows;
+# LEDFrameManager coarsens the step when strips can't be shown that often.
+DITHER_STEP = 0x10
+
+
+def order_pixel(color: tuple, order: str) -> list:
+    """Return color's channel values in the order a strip with the given pixel order expects.
+
+    Follows NeoPixel's rule for RGBW strips: an RGB color with r == g == b
+    is sent on the white channel alone.
+    """
+    r, g, b = color[0], color[1], color[2]
+    w = color[3] if len(color) > 3 else 0
+    if len(order) == 4 and len(color) == 3 and r == g == b:
+        r = g = b = 0
+        w = color[0]
+    channels = {"R": r, "G": g, "B": b, "W": w}
+    return [channels[c] for c in order]
+
+
+def encode_pixel(color: tuple, order: str) -> bytes:
+    """Return color as the bytes a PixelBuffer with the given pixel order expects."""
+    return bytes(order_pixel(color, order))
+
+
+class GammaTables:
+    """Builds and caches 256-entry dim curve tables for the LED paths.
+
+    A table maps a 0-255 value to the byte actually sent to the strip for
+    one (gamma, brightness, floor) combination: the gamma curve, floored to
+    `floor` for non-zero input, then scaled by the strip brightness the way
+    NeoPixel would. Strips are created at brightness 1.0 so it isn't applied
+    twice. Pixel tuple tables for trails are derived from these.
+
+    configure() swaps settings at runtime; it drops every cached table and
+    bumps `generation` so holders know to fetch new ones.
+    """
+
+    def __init__(self, trail_gamma: float = 0.5, hue_gamma: float = 0.8, floor: int = 1):
+        self.trail_gamma = trail_gamma
+        self.hue_gamma = hue_gamma
+        self.floor = floor
+        self.dither_step = DITHER_STEP
+        self.generation = 0
+        self.tables = {}
+        self.pixel_tables = {}
+
+    def set_dither_step(self, step: int):
+        """Quantize dithered levels to `step` (a power of two up to 0x100), rebuilding their tables."""
+        if step == self.dither_step:
+            return
+        self.dither_step = step
+        self.tables = {}
+        self.pixel_tables = {}
+        self.generation += 1
+
+    def configure(self, trail_gamma: float = None, hue_gamma: float = None, floor: int = None):
+        if trail_gamma is not None:
+            self.trail_gamma = trail_gamma
+        if hue_gamma is not None:
+            self.hue_gamma = hue_gamma
+        if floor is not None:
+            self.floor = floor
+        self.tables = {}
+        self.pixel_tables = {}
+        self.generation += 1
+
+    def table(self, gamma: float, brightness: float = 1.0, floor: int = None) -> bytes:
+        """Return the bytes LUT for (gamma, brightness, floor), building it on first use."""
+        if floor is None:
+            floor = self.floor
+        key = (gamma, brightness, floor)
+        table = self.tables.get(key)
+        if table is None:
+            table = bytes(
+                int(max(floor, int(pow(value / 255, 1 / gamma) * 255)) * brightness) if value else 0
+                for value in range(256)
+            )
+            self.tables[key] = table
+        return table
+
+    def table16(self, gamma: float, brightness: float = 1.0) -> array:
+        """Return the 8.8 fixed point LUT for (gamma, brightness), used by dithered strips.
+
+        Levels are rounded to `dither_step`. The floor is applied to the
+        16-bit level and counts dither steps, not whole levels: a non-zero
+        value lights at least `floor` steps, so the dark end keeps distinct
+        levels instead of all sitting on level 1.
+        """
+        step = self.dither_step
+        key = (gamma, brightness, "16", step)
+        table = self.tables.get(key)
+        if table is None:
+            table = array("H", [0] * 256)
+            for value in range(1, 256):
+                level = int(pow(value / 255, 1 / gamma) * DITHER_FULL_SCALE * brightness)
+                level = (level + step // 2) & ~(step - 1)
+                table[value] = min(DITHER_FULL_SCALE, max(self.floor * step, level))
+            self.tables[key] = table
+        return table
+
+    def channel_pixels(self, color_index: int, brightness: float = 1.0, order: str = None, dither: bool = False) -> list:
+        """Return the 257 pixels a single-color channel trail can show.
+
+        Entry v lights the channel's own color component at table[v];
+        TRAIL_OFF is black. With an order the entries are already encoded
+        for a PixelBuffer of that pixel order (8.8 levels for a dithered
+        one), otherwise they are RGB tuples. Shared by every holder, so the
+        trail write path never builds a color.
+        """
+        if order is not None:
+            return self.ordered(
+                self.channel_pixels(color_index, brightness, dither=dither),
+                ("channel", color_index, brightness, dither), order, dither
+            )
+        key = ("channel", color_index, brightness, dither)
+        pixels = self.pixel_tables.get(key)
+        if pixels is None:
+            if dither:
+                table = self.table16(self.trail_gamma, brightness)
+            else:
+                table = self.table(self.trail_gamma, brightness)
+            pixels = []
+            for value in range(256):
+                color = [0, 0, 0]
+                color[color_index] = table[value]
+                pixels.append(tuple(color))
+            pixels.append((0, 0, 0))
+            self.pixel_tables[key] = pixels
+        return pixels
+
+    def hue_pixels(self, brightness: float = 1.0, order: str = None, dither: bool = False) -> list:
+        """Return the 257 pixels of the Color Mix hue wheel (value 0-255 -> full saturation hue)."""
+        if order is not None:
+            return self.ordered(self.hue_pixels(brightness, dither=dither), ("hue", brightness, dither), order, dither)
+        key = ("hue", brightness, dither)
+        pixels = self.pixel_tables.get(key)
+        if pixels is None:
+            if dither:
+                table = self.table16(self.hue_gamma, brightness)
+            else:
+                table = self.table(self.hue_gamma, brightness)
+            pixels = []
+            for value in range(256):
+                h = (value / 255.0) * 360.0
+                rgb = hsv_to_rgb(h / 360.0, 1.0, 1.0)
+                pixels.append(tuple(table[int(c * 255)] for c in rgb))
+            pixels.append((0, 0, 0))
+            self.pixel_tables[key] = pixels
+        return pixels
+
+    def ordered(self, pixels: list, key: tuple, order: str, dither: bool = False) -> list:
+        key = key + (order,)
+        encoded = self.pixel_tables.get(key)
+        if encoded is None:
+            if dither:
+                encoded = [array("H", order_pixel(color, order)) for color in pixels]
+            else:
+                encoded = [encode_pixel(color, order) for color in pixels]
+            self.pixel_tables[key] = encoded
+        return encoded
+
+
+GAMMA_TABLES = GammaTables()
+
+
+class PixelBuffer:
+    """The raw byte image of one NeoPixel strip, in the strip's pixel order.
+
+    Pixels are assigned already encoded (see encode_pixel) and copied into
+    the buffer with a memoryview slice, skipping NeoPixel's per-pixel order
+    conversion and brightness scaling. show() sends the buffer with
+    neopixel_write on the strip's pin. The strip must use brightness 1.0,
+    brightness lives in the gamma tables.
+    """
+
+    dither = False
+
+    def __init__(self, strip, order: str):
+        self.strip = strip
+        self.order = order
+        self.bpp = len(order)
+        self.length = len(strip)
+        self.buf = bytearray(self.length * self.bpp)
+        self.view = memoryview(self.buf)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __setitem__(self, index: int, pixel: bytes):
+        offset = index * self.bpp
+        self.view[offset:offset + self.bpp] = pixel
+
+    def show(self):
+        neopixel_write(self.strip.pin, self.buf)
+
+
+class DitheredPixelBuffer(PixelBuffer):
+    """A PixelBuffer that takes 8.8 fixed point levels and dithers them over frames.
+
+    Pixels are assigned as array('H') levels from the dithered gamma tables
+    (dither=True). Each show() runs one first-order sigma-delta step per
+    byte: the fractional part left over is carried into the next frame, so
+    a level of 0.25 lights the LED at 1 on every fourth show. `fractional`
+    tells the frame manager whether the strip needs showing again to keep
+    averaging. With active off, levels are rounded to the nearest byte (a
+    non-zero level to at least 1) and no error is carried.
+    """
+
+    dither = True
+
+    def __init__(self, strip, order: str):
+        super().__init__(strip, order)
+        self.levels = array("H", [0] * len(self.buf))
+        self.levels_view = memoryview(self.levels)
+        self.error = bytearray(len(self.buf))
+        self.active = True
+        self.fractional = False
+
+    def __setitem__(self, index: int, pixel: array):
+        offset = index * self.bpp
+        self.levels_view[offset:offset + self.bpp] = pixel
+
+    def set_active(self, active: bool):
+        self.active = active
+        for i in range(len(self.error)):
+            self.error[i] = 0
+
+    def show(self):
+        levels = self.levels
+        error = self.error
+        buf = self.buf
+        fractional = 0
+        if self.active:
+            for i in range(len(buf)):
+                level = levels[i]
+                acc = level + error[i]
+                buf[i] = acc >> 8
+                error[i] = acc & 0xFF
+                fractional |= level & 0xFF
+        else:
+            for i in range(len(buf)):
+                level = levels[i]
+                # Keep lit pixels lit, the way the 8-bit tables floor them
+                buf[i] = ((level + 0x80) >> 8) or (1 if level else 0)
+        self.fractional = fractional != 0
+        neopixel_write(self.strip.pin, buf)
+
+
+class TrailBuffer:
+    """Fixed-size ring buffer of trail values, index 0 being the newest.
+
+    push() only moves the head index, so advancing costs the same for any
+    strip length. render() writes a pixel only where the value it shows
+    changed since the last render.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.values = array("H", [TRAIL_OFF] * length)
+        self.shown = array("H", [_UNKNOWN] * length)
+        self.head = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, i: int) -> int:
+        return self.values[(self.head + i) % self.length]
+
+    def push(self, value: int):
+        """Add value as the newest entry, dropping the oldest one."""
+        head = self.head - 1
+        if head < 0:
+            head = self.length - 1
+        self.values[head] = value
+        self.head = head
+
+    def oldest(self) -> int:
+        return self[self.length - 1]
+
+    def invalidate(self):
+        """Forget what the strip shows so the next render() resends every pixel."""
+        for i in range(self.length):
+            self.shown[i] = _UNKNOWN
+
+    def render(self, strip, pixels: list) -> bool:
+        """Write pixels[value] for every changed position to strip. Returns True if anything changed."""
+        values = self.values
+        shown = self.shown
+        length = self.length
+        k = self.head
+        changed = False
+        for i in range(length):
+            value = values[k]
+            if shown[i] != value:
+                strip[i] = pixels[value]
+                shown[i] = value
+                changed = True
+            k += 1
+            if k == length:
+                k = 0
+        return changed
+
+
+def _easing_table(easing: str) -> array:
+    """Map a 0-256 step phase to the eased 0-256 blend used by TrailAnimator."""
+    table = array("H", [0] * 257)
+    for i in range(257):
+        t = i / 256
+        if easing == "smoothstep":
+            t = t * t * (3 - 2 * t)
+        elif easing == "step":
+            t = 1.0 if t >= 0.5 else 0.0
+        table[i] = int(t * 256 + 0.5)
+    return table
+
+
+def _decay_table(decay: str, length: int) -> array:
+    """Per-position weights (0-256, position 0 newest) for a trail decay profile."""
+    weights = array("H", [256] * length)
+    for i in range(length):
+        if decay == "linear":
+            weights[i] = 256 * (length - i) // length
+        elif decay == "exponential":
+            weights[i] = int(256 * pow(0.7, i))
+    return weights
+
+
+class TrailAnimator:
+    """Advances a TrailBuffer on a fixed timestep, independent of the loop rate.
+
+    tick() adds the elapsed time to an accumulator and pushes one sample
+    per whole `step_ns`. When several steps are due at once, the samples
+    are interpolated from the last pushed value to the new one instead of
+    repeating it; at most `max_catchup` are pushed, the rest are dropped.
+
+    With `interpolate` on, render() also blends every position towards its
+    next value by the leftover fraction of a step (shaped by `easing`:
+    "linear", "smoothstep" or "step"), so the trail moves between pixels
+    smoothly. `decay` ("none", "linear", "exponential") fades values along
+    the trail. Both change what is shown each frame and so cost LED
+    bandwidth; with neither, render() is the plain TrailBuffer.render().
+
+    Set `hue` when the values are hue wheel positions (Color Mix): they are
+    then interpolated the short way around the wheel, and not decayed,
+    since scaling a hue index would change the color instead of fading it.
+
+    Counters: `steps` pushed, `missed` steps that had to be caught up in a
+    later tick, `late` ticks that arrived more than one step after the
+    previous one, and `dropped` steps over the catch-up limit.
+    """
+
+    def __init__(self, trail: TrailBuffer, step_ns: int, interpolate: bool = False,
+                 easing: str = "linear", decay: str = "none", max_catchup: int = None):
+        self.trail = trail
+        self.step_ns = max(1, step_ns)
+        self.interpolate = interpolate
+        self.easing = _easing_table(easing)
+        self.decay = _decay_table(decay, len(trail))
+        self.decays = decay != "none"
+        self.hue = False
+        self.max_catchup = max_catchup if max_catchup is not None else len(trail)
+        self.accumulator = 0
+        self.last_tick = None
+        self.last_value = TRAIL_OFF
+        self.steps = 0
+        self.missed = 0
+        self.late = 0
+        self.dropped = 0
+
+    def set_step(self, step_ns: int):
+        self.step_ns = max(1, step_ns)
+
+    def tick(self, now: int, value: int) -> int:
+        """Advance to time now (ns), pushing one sample of value per elapsed step. Returns steps pushed."""
+        if self.last_tick is None:
+            self.last_tick = now
+            return 0
+        elapsed = now - self.last_tick
+        self.last_tick = now
+        step = self.step_ns
+        if elapsed > step:
+            self.late += 1
+        acc = self.accumulator + elapsed
+        steps = acc // step
+        self.accumulator = acc - steps * step
+        if not steps:
+            return 0
+
+        self.missed += steps - 1
+        if steps > self.max_catchup:
+            self.dropped += steps - self.max_catchup
+            steps = self.max_catchup
+
+        start = self.last_value
+        trail = self.trail
+        if steps == 1 or start == TRAIL_OFF or value == TRAIL_OFF:
+            for _ in range(steps):
+                trail.push(value)
+        else:
+            span = value - start
+            if self.hue:
+                span = ((span + 128) & 0xFF) - 128
+                for k in range(1, steps + 1):
+                    trail.push((start + span * k // steps) & 0xFF)
+            else:
+                for k in range(1, steps + 1):
+                    trail.push(start + span * k // steps)
+        self.last_value = value
+        self.steps += steps
+        return steps
+
+    def render(self, strip, pixels: list, incoming: int) -> bool:
+        """Write the current frame of the trail to strip, only where it changed.
+
+        incoming is the value the next step will push; interpolation blends
+        position 0 towards it. Returns True if anything changed.
+        """
+        trail = self.trail
+        hue = self.hue
+        decays = self.decays and not hue
+        if not self.interpolate and not decays:
+            return trail.render(strip, pixels)
+
+        values = trail.values
+        shown = trail.shown
+        length = trail.length
+        decay = self.decay
+        blend = 0
+        if self.interpolate:
+            blend = self.easing[self.accumulator * 256 // self.step_ns]
+        k = trail.head
+        newer = incoming
+        changed = False
+        for i in range(length):
+            value = values[k]
+            if blend:
+                if value == TRAIL_OFF or newer == TRAIL_OFF:
+                    if blend >= 128:
+                        value = newer
+                elif hue:
+                    value = (value + ((((newer - value + 128) & 0xFF) - 128) * blend >> 8)) & 0xFF
+                else:
+                    value += (newer - value) * blend >> 8
+            if decays and value != TRAIL_OFF:
+                value = value * decay[i] >> 8
+            if shown[i] != value:
+                strip[i] = pixels[value]
+                shown[i] = value
+                changed = True
+            newer = values[k]
+            k += 1
+            if k == length:
+                k = 0
+        return changed
+
+
+class ChannelTrail:
+    """A channel's value trail strip and its cursor pixel, drawn through an LEDFrameManager.
+
+    update() advances the TrailAnimator to `now` and renders the frame;
+    only strips that changed are marked dirty, the frame manager shows
+    them. The cursor pixel mirrors the oldest trail entry. `mode` is
+    "channel" (the value on the channel's own color) or "hue" (the Color
+    Mix hue wheel); pixel tables come from GAMMA_TABLES and are fetched
+    again when its generation changes.
+    """
+
+    def __init__(self, frames, trail_strip, cursor_strip, cursor_index: int, color_index: int,
+                 brightness: float = 1.0, cursor_brightness: float = 1.0, step_ns: int = 70_000_000,
+                 animation: dict = None):
+        animation = animation or {}
+        self.frames = frames
+        self.trail_strip = trail_strip
+        self.cursor_strip = cursor_strip
+        self.cursor_index = cursor_index
+        self.color_index = color_index
+        self.brightness = brightness
+        self.cursor_brightness = cursor_brightness
+        self.trail = TrailBuffer(len(trail_strip))
+        self.animator = TrailAnimator(
+            self.trail, step_ns,
+            interpolate=animation.get("interpolate", False),
+            easing=animation.get("easing", "linear"),
+            decay=animation.get("decay", "none")
+        )
+        self.cursor_shown = None
+        self.mode = "channel"
+        self.refresh_pixel_tables()
+
+    def set_mode(self, mode: str):
+        self.mode = mode
+        self.refresh_pixel_tables()
+
+    def refresh_pixel_tables(self):
+        """Fetch the trail and cursor pixel tables for the current gamma settings."""
+        trail, cursor = self.trail_strip, self.cursor_strip
+        self.animator.hue = self.mode == "hue"
+        if self.mode == "hue":
+            self.trail_pixels = GAMMA_TABLES.hue_pixels(self.brightness, trail.order, trail.dither)
+            self.cursor_pixels = GAMMA_TABLES.hue_pixels(self.cursor_brightness, cursor.order, cursor.dither)
+        else:
+            self.trail_pixels = GAMMA_TABLES.channel_pixels(self.color_index, self.brightness, trail.order, trail.dither)
+            self.cursor_pixels = GAMMA_TABLES.channel_pixels(self.color_index, self.cursor_brightness, cursor.order, cursor.dither)
+        self.pixel_tables_generation = GAMMA_TABLES.generation
+        # Force every pixel to be resent with the new tables
+        self.trail.invalidate()
+        self.cursor_shown = None
+
+    def update(self, now: int, value: int, step_ns: int):
+        """Advance the trail to time now (ns), one step of value every step_ns, and render it."""
+        self.animator.set_step(step_ns)
+        self.animator.tick(now, value)
+        self.render(value)
+
+    def render(self, incoming: int):
+        """Send the current trail frame and cursor pixel, marking only changed strips dirty."""
+        if self.pixel_tables_generation != GAMMA_TABLES.generation:
+            self.refresh_pixel_tables()
+        if self.animator.render(self.trail_strip, self.trail_pixels, incoming):
+            self.frames.mark_dirty(self.trail_strip)
+
+        cursor_value = self.trail.oldest()
+        if cursor_value != self.cursor_shown:
+            self.cursor_strip[self.cursor_index] = self.cursor_pixels[cursor_value]
+            self.frames.mark_dirty(self.cursor_strip)
+            self.cursor_shown = cursor_value
+
+
+class LEDFrameManager:
+    """Owns every NeoPixel strip and sends each changed one once per frame.
+
+    Strips are registered by pin like a dict (`pin in manager`,
+    `manager[pin] = strip`). Writers call mark_dirty(strip) instead of
+    show(); the main loop calls flush() once per frame, which shows each
+    dirty strip exactly once no matter how many channels touched it.
+
+    With dither on, wrap() hands out DitheredPixelBuffers. Besides the
+    dirty strips, each flush re-shows up to `dither_budget` dithered strips
+    that are still averaging a fractional level, round robin, so the
+    dithering cost per frame is fixed.
+
+    Dithering only looks smooth if its longest on/off pattern repeats at
+    least `dither_min_fps` times a second. Every second the manager works
+    out how often each dithered strip can be shown (the flush rate times
+    dither_budget / dithered strips, capped at the flush rate) and picks
+    the finest step whose pattern (0x100 // step shows) still repeats that
+    fast, from 1/16 down to 1/2 of a level. If not even a two-show pattern
+    does, the strips fall back to plain rounding until the rate recovers.
+    So dithering needs strips shown at 2 * dither_min_fps or more; 1/16
+    steps need 16 * dither_min_fps. Dithering starts off until the first
+    rate measurement.
+    """
+
+    def __init__(self, dither: bool = False, dither_budget: int = 2, dither_min_fps: float = 60):
+        self.strips = {}
+        self.dirty = {}
+        self.frames = 0
+        self.shows = 0
+        self.last_frame_shows = 0
+        self.show_ns = 0
+        self.last_frame_show_ns = 0
+
+        self.dither = dither
+        self.dither_budget = dither_budget
+        self.dither_min_fps = dither_min_fps
+        self.dither_active = False
+        self.dither_period = 0  # Shows per dither pattern, 0 while dithering is off
+        self.strip_rate = 0.0
+        self.dithered = []
+        self.dither_next = 0
+        self.dither_refreshes = 0
+        self.frame_rate = 0.0
+        self.rate_started_at = time.monotonic_ns()
+        self.rate_frames = 0
+
+    def __contains__(self, pin) -> bool:
+        return pin in self.strips
+
+    def __getitem__(self, pin):
+        return self.strips[pin]
+
+    def __setitem__(self, pin, strip):
+        self.strips[pin] = strip
+        if strip.dither:
+            strip.set_active(self.dither_active)
+            self.dithered.append(strip)
+
+    def wrap(self, strip, order: str) -> PixelBuffer:
+        """Return the pixel buffer to register for a NeoPixel strip with the given pixel order."""
+        if self.dither:
+            return DitheredPixelBuffer(strip, order)
+        return PixelBuffer(strip, order)
+
+    def mark_dirty(self, strip):
+        self.dirty[id(strip)] = strip
+
+    def set_dither_active(self, active: bool):
+        """Switch dithering on the registered strips on or off, resending them with the new quantization."""
+        self.dither_active = active
+        for strip in self.dithered:
+            strip.set_active(active)
+            self.mark_dirty(strip)
+
+    def update_dither_period(self):
+        """Pick the dither step the measured frame rate can show without visible flicker."""
+        n = len(self.dithered)
+        self.strip_rate = self.frame_rate * min(1.0, self.dither_budget / n) if n else self.frame_rate
+        period = 0x100 // DITHER_STEP
+        while period >= 2 and self.strip_rate < period * self.dither_min_fps:
+            period //= 2
+        if period < 2:
+            period = 0
+        if period == self.dither_period:
+            return
+        self.dither_period = period
+        if period:
+            GAMMA_TABLES.set_dither_step(0x100 // period)
+            print(f"[leds] dithering in 1/{period} steps at {self.strip_rate:.0f} shows/s per strip")
+        else:
+            print(f"[leds] dithering off at {self.strip_rate:.0f} shows/s per strip")
+        self.set_dither_active(period > 0)
+
+    def flush(self) -> int:
+        """Show every strip marked dirty since the last flush. Returns how many were shown."""
+        self.frames += 1
+        count = 0
+        elapsed = 0
+        if self.dirty:
+            for strip in self.dirty.values():
+                started = time.monotonic_ns()
+                strip.show()
+                elapsed += time.monotonic_ns() - started
+                count += 1
+
+        if self.dither_active and self.dithered:
+            dithered = self.dithered
+            n = len(dithered)
+            i = self.dither_next
+            refreshes = 0
+            for _ in range(n):
+                if refreshes >= self.dither_budget:
+                    break
+                strip = dithered[i]
+                i = (i + 1) % n
+                if strip.fractional and id(strip) not in self.dirty:
+                    started = time.monotonic_ns()
+                    strip.show()
+                    elapsed += time.monotonic_ns() - started
+                    refreshes += 1
+            self.dither_next = i
+            self.dither_refreshes += refreshes
+            count += refreshes
+
+        if self.dirty:
+            self.dirty.clear()
+
+        if self.dither:
+            self.rate_frames += 1
+            now = time.monotonic_ns()
+            window = now - self.rate_started_at
+            if window >= 1_000_000_000:
+                self.frame_rate = self.rate_frames * 1_000_000_000 / window
+                self.rate_started_at = now
+                self.rate_frames = 0
+                self.update_dither_period()
+
+        self.shows += count
+        self.show_ns += elapsed
+        self.last_frame_shows = count
+        self.last_frame_show_ns = elapsed
+        return count
+
+    def stats(self) -> str:
+        frames = self.frames or 1
+        text = (
+            f"leds: {self.shows / frames:.2f} shows/frame, "
+            f"{self.show_ns / frames / 1000:.0f}us/frame in show()"
+        )
+        if self.dither:
+            state = f"1/{self.dither_period}" if self.dither_active else "off"
+            text += (f", dither {state} at {self.strip_rate:.0f} shows/s per strip "
+                     f"({self.dither_refreshes / frames:.2f} refreshes/frame)")
+        return text
@@ -0,0 +1,94 @@
+# === Menu Glue Helpers ===
+# The parts of the RGB Mix / Color Mix menus that don't touch displayio or
+# board: a knob channel's value, enable and trail, event routing, and the
+# color name label. code.py builds its menus on these, and
+# tools/bench_encoder_replay.py drives the same code on a host.
+
+from input_utils import EVENT_PRESS, EVENT_ROTATE, EncoderAccelerator, knob_value
+from led_utils import TRAIL_OFF
+
+
+def encoder_accelerator(config: dict, accelerate: bool = True) -> EncoderAccelerator:
+    """Build an EncoderAccelerator from the "encoder_acceleration" settings; accelerate=False keeps only the glitch filter."""
+    return EncoderAccelerator(
+        window=config.get("window", 0.1),
+        slow_rate=config.get("slow_rate", 5),
+        fast_rate=config.get("fast_rate", 40),
+        max_gain=config.get("max_gain", 6.0) if accelerate else 1.0,
+        exponent=config.get("exponent", 2.0),
+        glitch_rate=config.get("glitch_rate", 300)
+    )
+
+
+class KnobChannel:
+    """One color channel driven by an encoder: its value, enable flag and value trail.
+
+    handle_event() applies the channel encoder's events: turns move
+    `pending_value` through the EncoderAccelerator and knob_value, a press
+    toggles `channel_enabled`. `trail` is the channel's led_utils
+    ChannelTrail, drawn by update_trail().
+    """
+
+    def __init__(self, encoder_address: int, value: int, enabled: bool, position: int, accelerator, trail):
+        self.encoder_address = encoder_address
+        self.channel_enabled = enabled
+        self.value = value
+        self.pending_value = value
+        self.last_position = position
+        self.accelerator = accelerator
+        self.trail = trail
+
+    def handle_event(self, kind: int, value: int, timestamp: int, max_value: int = 255, sensitivity: int = 1):
+        """Apply one input event from this channel's encoder: turns change the value, a press toggles enable."""
+        if kind == EVENT_PRESS:
+            self.channel_enabled = not self.channel_enabled
+        elif kind == EVENT_ROTATE:
+            # Track the value on the host and clamp it there, the board is never written.
+            # Turning the knob clockwise (positive delta) lowers the value.
+            steps = self.accelerator.apply(value, timestamp)
+            self.pending_value = self.last_position = knob_value(self.last_position, steps, sensitivity, max_value)
+
+    def mix_value(self) -> int:
+        """Return what the channel adds to the mixed color: its value, or 0 while disabled."""
+        return self.pending_value if self.channel_enabled else 0
+
+    def update_trail(self, trail_delay: float, now: int):
+        """Advance the value trail to time now (ns), one step every trail_delay seconds."""
+        value = self.pending_value if self.channel_enabled else TRAIL_OFF
+        self.trail.update(now, value, int(trail_delay * 1_000_000_000))
+
+
+def dispatch_event(channels: list, kind: int, source: int, value: int, timestamp: int, sensitivity: int = 1):
+    """Route an input event to the channel whose encoder sent it. Returns that channel, or None."""
+    for channel in channels:
+        if channel.encoder_address == source:
+            channel.handle_event(kind, value, timestamp, sensitivity=sensitivity)
+            return channel
+    return None
+
+
+class ColorNameView:
+    """The color name label and preview swatch of a mix, written through a Renderer.
+
+    update() names the color with a color_utils.ColorNamer and writes the
+    label's text, color and scale and the preview palette entry only when
+    the named color changed.
+    """
+
+    def __init__(self, renderer, name_label, preview_palette, namer, text: str = "???",
+                 color: int = 0xFFFFFF, scale: int = 2, preview: int = 0x000000):
+        self.namer = namer
+        self.text = renderer.prop(name_label, "text", text)
+        self.color = renderer.prop(name_label, "color", color)
+        self.scale = renderer.prop(name_label, "scale", scale)
+        self.preview = renderer.item(preview_palette, 0, preview)
+
+    def update(self, r: int, g: int, b: int):
+        entry = self.namer.update(r, g, b)
+        if entry is None:
+            return
+        name, text_color, scale = entry
+        self.text.set(name)
+        self.color.set(text_color)
+        self.scale.set(scale)
+        self.preview.set((r << 16) | (g << 8) | b)
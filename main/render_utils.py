@@ -0,0 +1,110 @@
+# === Dirty-State Rendering Helpers ===
+# displayio marks an area for refresh on every property or palette write, even
+# when the value is unchanged. These wrappers remember the last value written
+# to each property and only touch the display object when it really changes.
+
+_UNSET = object()
+
+
+class Renderer:
+    """Counts displayio writes per frame for the properties it hands out."""
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace          # Print every frame that wrote something
+        self.frames = 0
+        self.frame_writes = 0       # Writes in the frame being rendered
+        self.last_frame_writes = 0  # Writes in the last finished frame
+        self.total_writes = 0
+        self.total_skips = 0
+
+    def prop(self, target, attr: str, value=_UNSET) -> "DirtyProperty":
+        """Track target.attr. Pass value if the object was created with it, to skip the first write."""
+        return DirtyProperty(self, target, attr, value)
+
+    def item(self, target, index: int, value=_UNSET) -> "DirtyItem":
+        """Track target[index], e.g. a displayio.Palette entry."""
+        return DirtyItem(self, target, index, value)
+
+    def mark(self, count: int = 1):
+        """Record writes made outside a tracked property (bitmap edits, group changes)."""
+        self.frame_writes += count
+
+    def begin_frame(self):
+        self.frame_writes = 0
+
+    def end_frame(self):
+        self.frames += 1
+        self.last_frame_writes = self.frame_writes
+        self.total_writes += self.frame_writes
+        if self.trace and self.frame_writes:
+            print(f"[render] frame {self.frames}: {self.frame_writes} writes")
+
+    def stats(self) -> str:
+        average = self.total_writes / self.frames if self.frames else 0
+        return f"render {average:.2f} writes/frame, {self.total_skips} skipped"
+
+
+class DirtyProperty:
+    def __init__(self, renderer: Renderer, target, attr: str, value=_UNSET):
+        self.renderer = renderer
+        self.target = target
+        self.attr = attr
+        self.value = value
+
+    def set(self, value) -> bool:
+        """Write value if it differs from the last one written. Returns True if it did."""
+        if value == self.value:
+            self.renderer.total_skips += 1
+            return False
+        setattr(self.target, self.attr, value)
+        self.value = value
+        self.renderer.frame_writes += 1
+        return True
+
+
+class DirtyItem:
+    def __init__(self, renderer: Renderer, target, index: int, value=_UNSET):
+        self.renderer = renderer
+        self.target = target
+        self.index = index
+        self.value = value
+
+    def set(self, value) -> bool:
+        """Write value if it differs from the last one written. Returns True if it did."""
+        if value == self.value:
+            self.renderer.total_skips += 1
+            return False
+        self.target[self.index] = value
+        self.value = value
+        self.renderer.frame_writes += 1
+        return True
+
+
+class ValueBar:
+    """A vertical bar drawn as one vectorio.Rectangle anchored at its bottom edge.
+
+    Changing the value only resizes the rectangle (y and height), so a jump
+    from 0 to 255 costs two property writes instead of a bitmap pixel loop.
+    """
+
+    def __init__(self, renderer: Renderer, shape, bottom: int, max_height: int, max_value: int = 255):
+        self.shape = shape
+        self.bottom = bottom
+        self.max_height = max_height
+        self.max_value = max_value
+        self.bar_height = 0
+        shape.hidden = True  # vectorio shapes need a height of at least 1
+        self.hidden = renderer.prop(shape, "hidden", True)
+        self.height = renderer.prop(shape, "height", shape.height)
+        self.y = renderer.prop(shape, "y", shape.y)
+        self.pixel_shader = renderer.prop(shape, "pixel_shader", shape.pixel_shader)
+
+    def set_value(self, value: int):
+        height = value * self.max_height // self.max_value
+        if height == self.bar_height:
+            return
+        self.bar_height = height
+        if height:
+            self.height.set(height)
+            self.y.set(self.bottom - height)
+        self.hidden.set(not height)
@@ -0,0 +1,200 @@
+# === State Persistence Helpers ===
+# Menu state (channel values, enables, trail delay, sensitivity, menu) is kept
+# across resets as a small binary record. Flash wears out and a write blocks
+# for a few milliseconds, so StateStore only writes once the knobs have been
+# idle for a while, the record actually changed and the last write is far
+# enough back. It cycles through fixed-size slots; each carries a sequence
+# number and a CRC, so a write torn by a reset fails the CRC and the previous
+# slot is restored instead.
+
+import struct
+import time
+from binascii import crc32
+
+STATE_MAGIC = 0x5453  # b"ST" little-endian
+STATE_VERSION = 1
+SLOT_HEADER = "<HBBI"  # magic, version, payload length, sequence
+SLOT_CRC = "<I"        # crc32 of header and payload
+STATE_HEAD = "<fBB"    # trail_delay, knob_sensitivity, menu_index
+STATE_CHANNEL = "<BBBhB"  # group, index, value, encoder position, enabled
+# Channel state key prefixes, stored as their index in this tuple
+CHANNEL_GROUPS = ("channel_", "colormix_channel_")
+
+_HEADER_SIZE = struct.calcsize(SLOT_HEADER)
+_CRC_SIZE = struct.calcsize(SLOT_CRC)
+_HEAD_SIZE = struct.calcsize(STATE_HEAD)
+_CHANNEL_SIZE = struct.calcsize(STATE_CHANNEL)
+
+
+def pack_state(state: dict, buf: bytearray, offset: int = 0) -> int:
+    """Pack a menu state dict into buf at offset; returns the number of bytes written."""
+    struct.pack_into(STATE_HEAD, buf, offset,
+                     state.get("trail_delay", 0.07),
+                     state.get("knob_sensitivity", 3),
+                     state.get("menu_index", 0))
+    end = offset + _HEAD_SIZE
+    for group, prefix in enumerate(CHANNEL_GROUPS):
+        index = 0
+        while f"{prefix}{index}" in state:
+            channel = state[f"{prefix}{index}"]
+            if end + _CHANNEL_SIZE > len(buf):
+                raise ValueError("state does not fit in a slot")
+            struct.pack_into(STATE_CHANNEL, buf, end, group, index,
+                             channel.get("value", 0),
+                             channel.get("encoder_position", 0),
+                             1 if channel.get("enabled", True) else 0)
+            end += _CHANNEL_SIZE
+            index += 1
+    return end - offset
+
+
+def unpack_state(data) -> dict:
+    """Rebuild the state dict pack_state was given."""
+    trail_delay, knob_sensitivity, menu_index = struct.unpack_from(STATE_HEAD, data, 0)
+    # float32 turns 0.01 into 0.009999999776; keep the delay readable
+    state = {"trail_delay": round(trail_delay, 6), "knob_sensitivity": knob_sensitivity, "menu_index": menu_index}
+    for offset in range(_HEAD_SIZE, len(data) - _CHANNEL_SIZE + 1, _CHANNEL_SIZE):
+        group, index, value, position, enabled = struct.unpack_from(STATE_CHANNEL, data, offset)
+        if group < len(CHANNEL_GROUPS):
+            state[f"{CHANNEL_GROUPS[group]}{index}"] = {
+                "value": value,
+                "encoder_position": position,
+                "enabled": enabled == 1
+            }
+    return state
+
+
+def _newer(a: int, b: int) -> bool:
+    """Compare 32-bit sequence numbers, allowing for wrap-around."""
+    return 0 < (a - b) & 0xFFFFFFFF < 0x80000000
+
+
+class FileStorage:
+    """A fixed-size flash file that reads and writes slices like microcontroller.nvm.
+
+    Needs CIRCUITPY writable from code (storage.remount in boot.py); open()
+    raises OSError otherwise.
+    """
+
+    def __init__(self, path: str, size: int):
+        try:
+            self.file = open(path, "r+b")
+        except OSError:
+            self.file = open(path, "w+b")
+        self.file.seek(0, 2)
+        length = self.file.tell()
+        if length < size:
+            self.file.write(bytes(size - length))
+            self.file.flush()
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: slice) -> bytes:
+        self.file.seek(index.start)
+        return self.file.read(index.stop - index.start)
+
+    def __setitem__(self, index: slice, data):
+        self.file.seek(index.start)
+        self.file.write(data)
+        self.file.flush()
+
+
+class StateStore:
+    """Saves menu state to rotating slots of `storage` (microcontroller.nvm or a FileStorage).
+
+    load() restores the newest slot with a valid CRC. touch() marks input
+    activity; update() is meant to run from a slow task and writes the state
+    to the next slot only once `idle` seconds have passed since the last
+    touch, at least `min_interval` seconds have passed since the last write,
+    and the packed record differs from the last one saved. Each write is one
+    slice assignment of `slot_size` bytes from a preallocated buffer.
+
+    Rotating slots only spreads wear where the storage does not rewrite a
+    whole erase block per write. On the RP2040, microcontroller.nvm is a
+    single 4 KB flash sector that is erased and rewritten on every write,
+    so there the slots only protect against torn writes; the idle and
+    min_interval limits are what bound the wear.
+    """
+
+    def __init__(self, storage, slots: int = 8, slot_size: int = 64, idle: float = 10.0,
+                 min_interval: float = 60.0):
+        self.storage = storage
+        self.slot_size = slot_size
+        self.slots = min(slots, len(storage) // slot_size)
+        if self.slots < 1:
+            raise ValueError(f"storage of {len(storage)} bytes has no room for a {slot_size} byte slot")
+        self.idle_ns = int(idle * 1_000_000_000)
+        self.min_interval_ns = int(min_interval * 1_000_000_000)
+        self.written_at = None
+        self.buf = bytearray(slot_size)
+        self.saved = b""  # Payload of the newest slot
+        self.sequence = 0
+        self.next_slot = 0
+        self.last_activity = time.monotonic_ns()
+        self.writes = 0
+        self.skips = 0
+        self.invalid = 0
+
+    def _read_slot(self, slot: int):
+        """Return (sequence, payload) of a slot, or None if it holds no valid record."""
+        start = slot * self.slot_size
+        data = self.storage[start:start + self.slot_size]
+        magic, version, length, sequence = struct.unpack_from(SLOT_HEADER, data, 0)
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            return None
+        end = _HEADER_SIZE + length
+        if end + _CRC_SIZE > self.slot_size:
+            return None
+        if struct.unpack_from(SLOT_CRC, data, end)[0] != crc32(data[:end]):
+            return None
+        return sequence, bytes(data[_HEADER_SIZE:end])
+
+    def load(self) -> dict:
+        """Return the state in the newest valid slot, or {} if there is none."""
+        newest = None
+        for slot in range(self.slots):
+            record = self._read_slot(slot)
+            if record is None:
+                self.invalid += 1
+            elif newest is None or _newer(record[0], newest[1]):
+                newest = (slot, record[0], record[1])
+        if newest is None:
+            return {}
+        slot, self.sequence, self.saved = newest
+        self.next_slot = (slot + 1) % self.slots
+        return unpack_state(self.saved)
+
+    def touch(self, now: int):
+        """Note input activity; saving waits until it has been idle for a while."""
+        self.last_activity = now
+
+    def update(self, state: dict, now: int) -> bool:
+        """Write state if the input has been idle long enough and it changed. Returns True if written."""
+        if now - self.last_activity < self.idle_ns:
+            return False
+        if self.written_at is not None and now - self.written_at < self.min_interval_ns:
+            return False
+        buf = self.buf
+        length = pack_state(state, buf, _HEADER_SIZE)
+        end = _HEADER_SIZE + length
+        if end + _CRC_SIZE > self.slot_size:
+            raise ValueError("state does not fit in a slot")
+        if buf[_HEADER_SIZE:end] == self.saved:
+            self.skips += 1
+            return False
+        sequence = (self.sequence + 1) & 0xFFFFFFFF
+        struct.pack_into(SLOT_HEADER, buf, 0, STATE_MAGIC, STATE_VERSION, length, sequence)
+        struct.pack_into(SLOT_CRC, buf, end, crc32(memoryview(buf)[:end]))
+        start = self.next_slot * self.slot_size
+        self.storage[start:start + self.slot_size] = buf
+        self.sequence = sequence
+        self.saved = bytes(buf[_HEADER_SIZE:end])
+        self.next_slot = (self.next_slot + 1) % self.slots
+        self.written_at = now
+        self.writes += 1
+        return True
+
+    def stats(self) -> str:
+        return f"state {self.writes} writes / {self.skips} unchanged, slot {self.next_slot}/{self.slots}"
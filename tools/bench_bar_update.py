@@ -0,0 +1,130 @@
+"""Benchmark the RGBMixMenu bar update with a mocked displayio.
+
+Compares the old per-pixel bitmap loop against render_utils.ValueBar (one
+vectorio.Rectangle resized in place) for small encoder steps and full-range
+jumps, reporting time and displayio writes per update. Runs under CPython;
+nothing from the device is imported besides render_utils.
+
+    python tools/bench_bar_update.py [--updates 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+
+from render_utils import Renderer, ValueBar  # noqa: E402
+
+SCREEN_WIDTH = 320
+SCREEN_HEIGHT = 172
+BAR_WIDTH = SCREEN_WIDTH // 3
+BAR_AREA_HEIGHT = int(SCREEN_HEIGHT * 0.60)
+
+
+class MockBitmap:
+    """Stands in for displayio.Bitmap, counting pixel writes."""
+
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(width * height)
+        self.writes = 0
+
+    def __setitem__(self, xy, value):
+        x, y = xy
+        self.pixels[y * self.width + x] = value
+        self.writes += 1
+
+
+class MockRectangle:
+    """Stands in for vectorio.Rectangle, counting property writes."""
+
+    def __init__(self, pixel_shader, width, height, x, y):
+        object.__setattr__(self, "writes", 0)
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        object.__setattr__(self, "writes", 0)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != "writes":  # Resetting the counter isn't a property write
+            object.__setattr__(self, "writes", self.writes + 1)
+
+
+class BitmapBar:
+    """The original bar: a full-size 2-color bitmap filled pixel by pixel."""
+
+    def __init__(self):
+        self.bitmap = MockBitmap(BAR_WIDTH, BAR_AREA_HEIGHT, 2)
+        self.last_height = 0
+
+    def set_value(self, val):
+        height = int((val / 255) * BAR_AREA_HEIGHT)
+        bitmap = self.bitmap
+        old_height = self.last_height
+        if height != old_height:
+            if height > old_height:
+                for x in range(BAR_WIDTH):
+                    for y in range(BAR_AREA_HEIGHT - height, BAR_AREA_HEIGHT - old_height):
+                        bitmap[x, y] = 1
+            else:
+                for x in range(BAR_WIDTH):
+                    for y in range(BAR_AREA_HEIGHT - old_height, BAR_AREA_HEIGHT - height):
+                        bitmap[x, y] = 0
+            self.last_height = height
+
+    def writes(self):
+        return self.bitmap.writes
+
+
+class RectangleBar:
+    def __init__(self):
+        bottom = SCREEN_HEIGHT - 24
+        self.shape = MockRectangle(pixel_shader=None, width=BAR_WIDTH, height=1, x=0, y=bottom - 1)
+        self.bar = ValueBar(Renderer(), self.shape, bottom, BAR_AREA_HEIGHT)
+        self.shape.writes = 0
+
+    def set_value(self, val):
+        self.bar.set_value(val)
+
+    def writes(self):
+        return self.shape.writes
+
+
+def run(label, bar, values):
+    started = time.perf_counter()
+    for val in values:
+        bar.set_value(val)
+    per_update = (time.perf_counter() - started) / len(values) * 1e6
+    print(f"{label:<34} {per_update:10.1f} us/update {bar.writes() / len(values):10.1f} writes/update")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    steps = []
+    val = 0
+    for _ in range(args.updates):
+        val = max(0, min(255, val + rng.choice((-3, 3))))
+        steps.append(val)
+    jumps = [255 if i % 2 else 0 for i in range(args.updates)]
+
+    print(f"bar {BAR_WIDTH}x{BAR_AREA_HEIGHT} px")
+    for name, values in (("encoder steps (+-3)", steps), ("full jumps (0 <-> 255)", jumps)):
+        print(f"-- {name}")
+        run("before: bitmap pixel loop", BitmapBar(), values)
+        run("after: vectorio.Rectangle resize", RectangleBar(), values)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Micro-benchmark closest_named_color against the original full-sort version.
+
+Runs under CPython with a synthetic palette (no device, no named_colors.json
+contents involved) and reports per-call time and the peak heap growth of a
+single call as measured by tracemalloc.
+
+    python tools/bench_closest_named_color.py [--size 256] [--calls 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+os.chdir(MAIN_DIR)
+
+import color_utils  # noqa: E402
+
+
+def mock_palette(size, seed):
+    rng = random.Random(seed)
+    return [
+        {"name": f"color{i:04}", "rgb": [rng.randrange(256), rng.randrange(256), rng.randrange(256)]}
+        for i in range(size)
+    ]
+
+
+named_colors_raw = []
+
+
+def sorted_closest_named_color(r, g, b, blend_threshold=0.25, show_two_colors=False, show_hex=True):
+    """The original implementation: build every distance, sort them all."""
+    distances = sorted(
+        (
+            (r - color["rgb"][0])**2 +
+            (g - color["rgb"][1])**2 +
+            (b - color["rgb"][2])**2,
+            color["name"]
+        )
+        for color in named_colors_raw
+    )
+    closest_dist, closest_name = distances[0]
+    second_dist, second_name = distances[1]
+    if r == 0 and g == 0 and b == 0:
+        name = "black"
+    elif not show_two_colors:
+        name = closest_name
+    elif closest_dist == 0:
+        name = closest_name
+    elif second_dist / closest_dist < (1 + blend_threshold):
+        name = f"{closest_name} with {second_name}"
+    else:
+        name = closest_name
+    if show_hex:
+        name = f"{name} ({color_utils.rgb_to_hex(r, g, b)})"
+    return name
+
+
+def measure(label, func, queries, **kwargs):
+    func(*queries[0], **kwargs)  # warm up
+    started = time.perf_counter()
+    for rgb in queries:
+        func(*rgb, **kwargs)
+    per_call = (time.perf_counter() - started) / len(queries) * 1e6
+
+    tracemalloc.start()
+    peaks = []
+    for rgb in queries[:200]:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func(*rgb, **kwargs)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    print(f"{label:<46} {per_call:9.1f} us/call {max(peaks):9d} B peak heap/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=256, help="number of entries in the mock palette")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    named_colors_raw[:] = mock_palette(args.size, args.seed)
+    color_utils.set_palette(named_colors_raw)
+    rng = random.Random(args.seed + 1)
+    queries = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(args.calls)]
+    backend = color_utils.nearest_search.__name__
+    print(f"mock palette: {args.size} colors, {len(color_utils.kd_index)} distinct, backend {backend}")
+
+    # CPython boxes ints above 256 and the frame itself, so an empty call sets the floor
+    measure("floor: empty call", lambda r, g, b, **kwargs: None, queries)
+    for show_two_colors in (False, True):
+        print(f"-- show_two_colors={show_two_colors}")
+        measure("before: full sort", sorted_closest_named_color, queries, show_two_colors=show_two_colors)
+        measure(f"after: closest_named_color ({backend})", color_utils.closest_named_color, queries,
+                show_two_colors=show_two_colors)
+        measure("after: name search only (linear)", color_utils.linear_nearest, queries,
+                want_second=show_two_colors)
+        measure("after: name search only (k-d tree)", color_utils.kd_nearest, queries,
+                want_second=show_two_colors)
+
+
+if __name__ == "__main__":
+    main()
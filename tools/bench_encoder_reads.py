@@ -0,0 +1,191 @@
+"""Benchmark encoder I2C traffic against a mock seesaw bus.
+
+Drives four simulated encoder boards with random knob turns and button
+presses and counts the I2C transactions and settle delays needed per loop:
+
+  legacy     the old Channel.update_encoder path (read position, read
+             button, write position back)
+  polled     input_utils.SeesawEncoder read every loop
+  interrupt  SeesawEncoder read only on loops where a board would have
+             pulled the INT line low
+
+The channel values produced by the legacy and new paths are compared step
+by step. Runs under CPython; only input_utils is imported from main/.
+
+    python tools/bench_encoder_reads.py [--loops 5000] [--activity 0.1]
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+
+from input_utils import SeesawEncoder  # noqa: E402
+
+MAX_ENCODER_DELTA = 50
+BUTTON_PIN = 24
+
+
+class MockSeesaw:
+    """Register-level stand-in for a seesaw encoder board on a counted bus.
+
+    A register read costs two bus transactions plus its settle delay, a
+    write costs one, the same as adafruit_seesaw.Seesaw.read()/write().
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.delta = 0
+        self.button_down = False
+        self.gpio_flags = 0
+        self.transactions = 0
+        self.delay = 0.0
+
+    # Hardware side
+    def turn(self, steps):
+        self.position += steps
+        self.delta += steps
+
+    def set_button(self, down):
+        if down != self.button_down:
+            self.button_down = down
+            self.gpio_flags |= 1 << BUTTON_PIN
+
+    def interrupt(self):
+        return self.delta != 0 or self.gpio_flags != 0
+
+    # Bus side
+    def read(self, reg_base, reg, buf, delay=0.008):
+        self.transactions += 2
+        self.delay += delay
+        if reg_base == 0x11 and reg == 0x40:
+            struct.pack_into(">i", buf, 0, self.delta)
+            self.delta = 0
+        elif reg_base == 0x11 and reg == 0x30:
+            struct.pack_into(">i", buf, 0, self.position)
+            self.delta = 0
+        elif reg_base == 0x01 and reg == 0x04:
+            levels = 0xFFFFFFFF & ~((1 << BUTTON_PIN) if self.button_down else 0)
+            struct.pack_into(">I", buf, 0, levels)
+        elif reg_base == 0x01 and reg == 0x0A:
+            struct.pack_into(">I", buf, 0, self.gpio_flags)
+            self.gpio_flags = 0
+
+    def write(self, reg_base, reg, buf=None):
+        self.transactions += 1
+        if reg_base == 0x11 and reg == 0x30:
+            self.position = struct.unpack(">i", buf)[0]
+
+    # adafruit_seesaw helpers used by the legacy path
+    def encoder_position(self):
+        buf = bytearray(4)
+        self.read(0x11, 0x30, buf)
+        return struct.unpack(">i", buf)[0]
+
+    def set_encoder_position(self, pos):
+        self.write(0x11, 0x30, struct.pack(">i", pos))
+
+    def digital_read(self, pin):
+        buf = bytearray(4)
+        self.read(0x01, 0x04, buf)
+        return struct.unpack(">I", buf)[0] & (1 << pin) != 0
+
+
+def legacy_update(board, state, sensitivity):
+    """The old Channel.update_encoder: absolute position, button, write-back."""
+    raw_pos = -board.encoder_position()
+    state["pressed"] = not board.digital_read(BUTTON_PIN)
+    computed = max(0, min(255, raw_pos * sensitivity))
+    if abs(computed - state["value"]) > MAX_ENCODER_DELTA:
+        computed = state["value"]
+    state["value"] = computed
+    board.set_encoder_position(-int(computed / sensitivity))
+
+
+def host_update(encoder, state, sensitivity):
+    """The new Channel.update_encoder: delta read, host-side clamping."""
+    delta = encoder.read()
+    state["pressed"] = encoder.pressed
+    raw_pos = int(state["value"] / sensitivity) - delta
+    computed = max(0, min(255, raw_pos * sensitivity))
+    if abs(computed - state["value"]) > MAX_ENCODER_DELTA:
+        computed = state["value"]
+    state["value"] = computed
+
+
+def run(mode, script, sensitivity, read_delay):
+    boards = [MockSeesaw() for _ in range(4)]
+    encoders = [SeesawEncoder(b, BUTTON_PIN, mode == "interrupt", read_delay) for b in boards]
+    for b in boards:
+        b.transactions = 0
+        b.delay = 0.0
+    states = [{"value": 0, "pressed": False} for _ in boards]
+    values = []
+    read_loops = 0
+    for events in script:
+        for i, steps, button in events:
+            boards[i].turn(steps)
+            boards[i].set_button(button)
+        if mode == "interrupt" and not any(b.interrupt() for b in boards):
+            values.append(tuple(s["value"] for s in states))
+            continue
+        read_loops += 1
+        for board, encoder, state in zip(boards, encoders, states):
+            if mode == "legacy":
+                legacy_update(board, state, sensitivity)
+            else:
+                host_update(encoder, state, sensitivity)
+        values.append(tuple(s["value"] for s in states))
+    transactions = sum(b.transactions for b in boards)
+    delay = sum(b.delay for b in boards)
+    return transactions, delay, read_loops, values
+
+
+def make_script(loops, activity, seed):
+    rng = random.Random(seed)
+    buttons = [False] * 4
+    script = []
+    for _ in range(loops):
+        events = []
+        for i in range(4):
+            steps = 0
+            if rng.random() < activity:
+                steps = rng.choice((-3, -2, -1, 1, 2, 3))
+            if rng.random() < activity / 20:
+                buttons[i] = not buttons[i]
+            events.append((i, steps, buttons[i]))
+        script.append(events)
+    return script
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loops", type=int, default=5000)
+    parser.add_argument("--activity", type=float, default=0.1,
+                        help="chance per loop that a knob turns")
+    parser.add_argument("--sensitivity", type=int, default=3)
+    parser.add_argument("--read-delay", type=float, default=0.008)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    script = make_script(args.loops, args.activity, args.seed)
+    results = {}
+    for mode in ("legacy", "polled", "interrupt"):
+        results[mode] = run(mode, script, args.sensitivity, args.read_delay)
+
+    print(f"{args.loops} loops, 4 boards, activity {args.activity}")
+    print(f"{'mode':<10} {'tx/loop':>8} {'delay ms/loop':>14} {'loops read':>11}")
+    for mode, (transactions, delay, read_loops, _) in results.items():
+        print(f"{mode:<10} {transactions / args.loops:8.2f} {delay * 1000 / args.loops:14.2f} {read_loops:11}")
+
+    legacy_values = results["legacy"][3]
+    for mode in ("polled", "interrupt"):
+        mismatches = sum(a != b for a, b in zip(legacy_values, results[mode][3]))
+        print(f"{mode} values differing from legacy: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Replay an encoder trace, or a synthetic sweep, through the RGB Mix menu's input, LED and naming path.
+
+Drives input_utils.EncoderInput with SimulatedEncoder players under a
+VirtualClock, so every run sees the same reads at the same times no matter
+how fast the host is. The code under test is the same code code.py runs:
+events are routed to menu_utils.KnobChannels (EncoderAccelerator and
+knob_value), trails and cursor pixels are drawn by led_utils.ChannelTrail
+into an LEDFrameManager, and display frames name the mix through a
+menu_utils.ColorNameView and a Renderer into mock labels. Only the hardware
+is mocked (strips, neopixel_write, labels, palette); the knob sensitivity
+defaults to the device's "knob_sensitivity" setting. Reports real time
+spent per input loop, trail frame and display frame. Runs under CPython.
+
+Traces come from a device with "encoder_trace": {"record": "/trace.bin"}
+in settings.json, or from --save-sweep.
+
+    python tools/bench_encoder_replay.py [--trace trace.bin] [--seconds 30]
+    python tools/bench_encoder_replay.py --save-sweep sweep.bin
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import types
+
+CALLER_DIR = os.getcwd()
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+os.chdir(MAIN_DIR)
+
+
+class MockNeoPixelWrite:
+    """Stands in for the neopixel_write module, counting bytes sent."""
+
+    def __init__(self):
+        self.writes = 0
+        self.bytes = 0
+
+    def neopixel_write(self, pin, buf):
+        self.writes += 1
+        self.bytes += len(buf)
+
+
+NEOPIXEL_WRITE = MockNeoPixelWrite()
+sys.modules["neopixel_write"] = types.SimpleNamespace(neopixel_write=NEOPIXEL_WRITE.neopixel_write)
+
+from color_utils import ColorNamer  # noqa: E402
+from input_utils import EncoderInput, VirtualClock, load_trace, replay_trace, save_trace, sweep_trace  # noqa: E402
+from led_utils import GAMMA_TABLES, ChannelTrail, LEDFrameManager  # noqa: E402
+from menu_utils import ColorNameView, KnobChannel, dispatch_event, encoder_accelerator  # noqa: E402
+from render_utils import Renderer  # noqa: E402
+
+COLOR_NAME_CACHE_SIZE = 64
+
+
+class MockStrip:
+    """Stands in for a neopixel.NeoPixel: a pin and a length."""
+
+    def __init__(self, pin, count):
+        self.pin = pin
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+
+class MockLabel:
+    """Stands in for adafruit_display_text.label.Label."""
+
+    def __init__(self):
+        self.text = "???"
+        self.color = 0xFFFFFF
+        self.scale = 2
+
+
+def bench_channel(config, index, frames, cursor_strip, settings):
+    """Build the KnobChannel code.py's Channel is, on mock strips instead of board pins."""
+    order = config.get("trail_pixel_order", "RGB")
+    trail_strip = frames.wrap(MockStrip(config["trail_pin"], config.get("trail_count", 8)), order)
+    frames[config["trail_pin"]] = trail_strip
+    animation = settings.get("trail_animation", {})
+    trail = ChannelTrail(
+        frames, trail_strip, cursor_strip, config["cursor_pixel_id"], index,
+        brightness=config.get("brightness", 0.4),
+        cursor_brightness=settings.get("cursor_pixel_brightness", 1.0),
+        step_ns=int(animation.get("step", 0.07) * 1_000_000_000),
+        animation=animation
+    )
+    initial = config.get("initial_value", 0)
+    accelerator = encoder_accelerator(settings.get("encoder_acceleration", {}))
+    return KnobChannel(int(config["encoder_addr"], 16), initial, True, initial, accelerator, trail)
+
+
+def run(scripts, settings, args):
+    clock = VirtualClock()
+    encoder_input = EncoderInput(button_timing=settings.get("button_timing", {}), clock=clock)
+    led_gamma = settings.get("led_gamma", {})
+    GAMMA_TABLES.configure(led_gamma.get("trail", 0.5), led_gamma.get("hue", 0.8), led_gamma.get("floor", 1))
+    led_dither = settings.get("led_dither", {})
+    frames = LEDFrameManager(
+        dither=led_dither.get("enabled", False),
+        dither_budget=led_dither.get("refresh_budget", 2),
+        dither_min_fps=led_dither.get("min_fps", 60)
+    )
+    cursor_order = settings.get("cursor_pixel_order", "RGB")
+    cursor_strip = frames.wrap(MockStrip(settings["cursor_strip_pin"], settings["cursor_strip_count"]), cursor_order)
+    frames[settings["cursor_strip_pin"]] = cursor_strip
+    channels = [bench_channel(config, index, frames, cursor_strip, settings)
+                for index, config in enumerate(settings["channels"])]
+    trail_delay = settings.get("trail_animation", {}).get("step", 0.07)
+
+    renderer = Renderer()
+    color_name = ColorNameView(renderer, MockLabel(), [0x000000], ColorNamer(COLOR_NAME_CACHE_SIZE))
+    players = replay_trace(encoder_input, scripts, clock)
+
+    loop_seconds = 1 / args.encoder_rate
+    trail_every = max(1, round(args.encoder_rate / args.trail_rate))
+    frame_every = max(1, round(args.encoder_rate / args.display_rate))
+    loops = events = trail_frames = frames_drawn = 0
+    input_ns = trail_ns = frame_ns = 0
+    while clock() < args.seconds * 1_000_000_000:
+        started = time.perf_counter_ns()
+        encoder_input.update()
+        while encoder_input.events:
+            kind, source, value, timestamp = encoder_input.events.pop()
+            dispatch_event(channels, kind, source, value, timestamp, args.sensitivity)
+            events += 1
+        input_ns += time.perf_counter_ns() - started
+
+        if loops % trail_every == 0:
+            started = time.perf_counter_ns()
+            for channel in channels:
+                channel.update_trail(trail_delay, clock())
+            frames.flush()
+            trail_ns += time.perf_counter_ns() - started
+            trail_frames += 1
+
+        if loops % frame_every == 0:
+            started = time.perf_counter_ns()
+            renderer.begin_frame()
+            color_name.update(*[channel.mix_value() for channel in channels])
+            renderer.end_frame()
+            frame_ns += time.perf_counter_ns() - started
+            frames_drawn += 1
+        loops += 1
+        clock.advance(loop_seconds)
+        if all(player.finished() for player in players) and not encoder_input.events:
+            break
+
+    return {
+        "virtual seconds": clock() / 1_000_000_000,
+        "loops": loops,
+        "events": events,
+        "input us/loop": input_ns / loops / 1000 if loops else 0,
+        "trail frames": trail_frames,
+        "trail us/frame": trail_ns / trail_frames / 1000 if trail_frames else 0,
+        "strip shows": NEOPIXEL_WRITE.writes,
+        "led bytes": NEOPIXEL_WRITE.bytes,
+        "display frames": frames_drawn,
+        "display us/frame": frame_ns / frames_drawn / 1000 if frames_drawn else 0,
+        "naming": color_name.namer.stats(),
+        "render": renderer.stats(),
+        "final values": tuple(channel.pending_value for channel in channels),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="trace file recorded on the device; a sweep if omitted")
+    parser.add_argument("--seconds", type=float, default=30.0, help="virtual seconds to run at most")
+    parser.add_argument("--sweep-rate", type=float, default=20.0, help="detents per second in the sweep")
+    parser.add_argument("--save-sweep", help="write the synthetic sweep as a trace file and exit")
+    parser.add_argument("--encoder-rate", type=float, default=200.0, help="encoder reads per virtual second")
+    parser.add_argument("--trail-rate", type=float, default=100.0, help="trail frames per virtual second")
+    parser.add_argument("--display-rate", type=float, default=30.0, help="display frames per virtual second")
+    parser.add_argument("--sensitivity", type=int, help="value steps per encoder step; the device's by default")
+    args = parser.parse_args()
+
+    with open("settings.json") as f:
+        settings = json.load(f)
+    if args.sensitivity is None:
+        args.sensitivity = settings.get("knob_sensitivity", 3)
+
+    if args.trace:
+        scripts = load_trace(os.path.join(CALLER_DIR, args.trace))
+        source = args.trace
+    else:
+        addresses = [int(c["encoder_addr"], 16) for c in settings["channels"]]
+        scripts = sweep_trace(addresses, seconds=args.seconds, rate=args.sweep_rate)
+        source = f"sweep at {args.sweep_rate:g} detents/s"
+        if args.save_sweep:
+            save_trace(os.path.join(CALLER_DIR, args.save_sweep), scripts)
+            print(f"wrote {sum(len(s) for s in scripts.values())} records to {args.save_sweep}")
+            return
+
+    results = run(scripts, settings, args)
+    print(f"{source}, {sum(len(s) for s in scripts.values())} records")
+    for name, value in results.items():
+        print(f"{name:<18} {value:.2f}" if isinstance(value, float) else f"{name:<18} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Build main/named_colors.lut, the quantized RGB -> named color table used by
+color_utils.closest_named_color.
+
+The RGB cube is split into (2 ** bits) ** 3 cells. A cell whose every color has
+the same closest palette entry stores that entry's index directly. A cell on a
+boundary stores a short candidate list instead (closest-to-center entry first)
+which color_utils refines at runtime.
+
+    python tools/build_name_lut.py [--bits 4] [--output main/named_colors.lut]
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+from array import array
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+os.chdir(MAIN_DIR)
+
+import color_utils  # noqa: E402
+
+
+def unique_palette():
+    """Return (index, r, g, b) for the first palette entry of every distinct color."""
+    seen = set()
+    entries = []
+    rgb = color_utils.palette_rgb
+    for index in range(color_utils.palette_size()):
+        color = (rgb[3 * index], rgb[3 * index + 1], rgb[3 * index + 2])
+        if color not in seen:
+            seen.add(color)
+            entries.append((index,) + color)
+    return entries
+
+
+def axis_tables(bits, extent=None):
+    """Per cell coordinate, the min and max squared distance from each channel value to the cell span.
+
+    A cell spans lo..lo + extent, by default just the integer values it holds.
+    """
+    size = 256 >> bits
+    if extent is None:
+        extent = size - 1
+    near = []
+    far = []
+    for k in range(1 << bits):
+        lo = k * size
+        hi = lo + extent
+        near.append([0 if lo <= v <= hi else min((v - lo) ** 2, (v - hi) ** 2) for v in range(256)])
+        far.append([max((v - lo) ** 2, (v - hi) ** 2) for v in range(256)])
+    return near, far
+
+
+def build(bits):
+    entries = unique_palette()
+    near, far = axis_tables(bits)
+    size = 256 >> bits
+    side = 1 << bits
+
+    cells = array("H", [0] * (side ** 3))
+    candidates = array("H")
+    list_offsets = {}
+    boundary_cells = 0
+
+    for kr in range(side):
+        near_r, far_r = near[kr], far[kr]
+        cr = 2 * kr * size + size - 1
+        for kg in range(side):
+            near_g, far_g = near[kg], far[kg]
+            cg = 2 * kg * size + size - 1
+            for kb in range(side):
+                near_b, far_b = near[kb], far[kb]
+                cb = 2 * kb * size + size - 1
+
+                best_far = min(far_r[r] + far_g[g] + far_b[b] for _, r, g, b in entries)
+                found = [
+                    (index, r, g, b) for index, r, g, b in entries
+                    if near_r[r] + near_g[g] + near_b[b] <= best_far
+                ]
+                cell = (kr << (bits + bits)) | (kg << bits) | kb
+                if len(found) == 1:
+                    cells[cell] = found[0][0]
+                    continue
+
+                boundary_cells += 1
+                center_index = min(
+                    found,
+                    key=lambda e: ((2 * e[1] - cr) ** 2 + (2 * e[2] - cg) ** 2 + (2 * e[3] - cb) ** 2, e[0])
+                )[0]
+                run = (center_index,) + tuple(sorted(e[0] for e in found if e[0] != center_index))
+                offset = list_offsets.get(run)
+                if offset is None:
+                    offset = len(candidates)
+                    if offset >= color_utils.NAME_LUT_LIST_FLAG:
+                        raise ValueError(f"candidate table overflow at {bits} bits, try fewer bits")
+                    list_offsets[run] = offset
+                    candidates.append(len(run))
+                    candidates.extend(run)
+                cells[cell] = color_utils.NAME_LUT_LIST_FLAG | offset
+
+    return cells, candidates, boundary_cells
+
+
+def write_lut(path, bits, cells, candidates):
+    header = struct.pack(
+        color_utils.NAME_LUT_HEADER,
+        color_utils.NAME_LUT_MAGIC,
+        color_utils.NAME_LUT_VERSION,
+        bits,
+        color_utils.palette_size(),
+        color_utils.palette_checksum(),
+        len(candidates),
+    )
+    if sys.byteorder != "little":
+        cells.byteswap()
+        candidates.byteswap()
+    with open(path, "wb") as f:
+        f.write(header)
+        cells.tofile(f)
+        candidates.tofile(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bits", type=int, default=4, choices=range(1, 8),
+                        help="bits per channel of the quantized cube (default 4 -> 16x16x16)")
+    parser.add_argument("--output", default=os.path.join(MAIN_DIR, color_utils.NAME_LUT_FILE))
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    cells, candidates, boundary_cells = build(args.bits)
+    write_lut(args.output, args.bits, cells, candidates)
+    print(f"{len(cells)} cells ({boundary_cells} on a boundary), "
+          f"{len(candidates)} candidate words, {os.path.getsize(args.output)} bytes "
+          f"-> {args.output} in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
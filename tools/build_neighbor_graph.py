@@ -0,0 +1,139 @@
+"""Build main/named_colors.adj, the palette adjacency graph behind color_utils.NameTracker.
+
+Two palette colors are neighbors when their Voronoi cells touch somewhere
+inside the RGB cube. The cube is cut into (2 ** bits) ** 3 closed cells
+(neighboring cells share their faces, so no boundary plane can fall between
+them) and, per cell, every color that could be closest somewhere in it is kept unless some
+other candidate beats it across the whole cell. Surviving pairs whose
+bisecting plane crosses the cell become edges. Every real Voronoi neighbor
+pair survives these tests, so the graph may hold a few extra edges but never
+misses one, which is what keeps the tracker's greedy walk exact.
+
+    python tools/build_neighbor_graph.py [--bits 5] [--check 20000]
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+from build_name_lut import MAIN_DIR, axis_tables, color_utils, unique_palette
+
+
+def plane_min(w0, w1, w2, const, lo, hi):
+    """Minimum of w . x + const over the box lo..hi."""
+    return (const + (w0 * lo[0] if w0 > 0 else w0 * hi[0])
+            + (w1 * lo[1] if w1 > 0 else w1 * hi[1])
+            + (w2 * lo[2] if w2 > 0 else w2 * hi[2]))
+
+
+def build(bits):
+    entries = unique_palette()
+    size = 256 >> bits
+    near, far = axis_tables(bits, extent=size)
+    side = 1 << bits
+    edges = set()
+
+    for kr in range(side):
+        for kg in range(side):
+            for kb in range(side):
+                lo = (kr * size, kg * size, kb * size)
+                hi = (lo[0] + size, lo[1] + size, lo[2] + size)
+                near_r, near_g, near_b = near[kr], near[kg], near[kb]
+                far_r, far_g, far_b = far[kr], far[kg], far[kb]
+                best_far = min(far_r[r] + far_g[g] + far_b[b] for _, r, g, b in entries)
+                found = [e for e in entries if near_r[e[1]] + near_g[e[2]] + near_b[e[3]] <= best_far]
+                if len(found) < 2:
+                    continue
+
+                # d(x, i) - d(x, k) = 2 (k - i) . x + |i|^2 - |k|^2
+                viable = []
+                for i, ir, ig, ib in found:
+                    i_sq = ir * ir + ig * ig + ib * ib
+                    for k, kr_, kg_, kb_ in found:
+                        if k != i and plane_min(2 * (kr_ - ir), 2 * (kg_ - ig), 2 * (kb_ - ib),
+                                                i_sq - (kr_ * kr_ + kg_ * kg_ + kb_ * kb_), lo, hi) > 0:
+                            break
+                    else:
+                        viable.append((i, ir, ig, ib, i_sq))
+
+                for a in range(len(viable)):
+                    i, ir, ig, ib, i_sq = viable[a]
+                    for k, kr_, kg_, kb_, k_sq in viable[a + 1:]:
+                        w0, w1, w2 = 2 * (kr_ - ir), 2 * (kg_ - ig), 2 * (kb_ - ib)
+                        const = i_sq - k_sq
+                        # The bisector crosses the cell when the plane takes both signs on it
+                        if (plane_min(w0, w1, w2, const, lo, hi) <= 0
+                                and -plane_min(-w0, -w1, -w2, -const, lo, hi) >= 0):
+                            edges.add((i, k))
+                            edges.add((k, i))
+
+    count = color_utils.palette_size()
+    start = array("H", [0] * (count + 1))
+    neighbors = array("H")
+    for i in range(count):
+        start[i] = len(neighbors)
+        neighbors.extend(sorted(k for a, k in edges if a == i))
+    start[count] = len(neighbors)
+    return start, neighbors, len(entries)
+
+
+def write_graph(path, start, neighbors):
+    header = struct.pack(
+        color_utils.NEIGHBOR_GRAPH_HEADER,
+        color_utils.NEIGHBOR_GRAPH_MAGIC,
+        color_utils.NEIGHBOR_GRAPH_VERSION,
+        color_utils.palette_size(),
+        color_utils.palette_checksum(),
+        len(neighbors),
+    )
+    if sys.byteorder != "little":
+        start.byteswap()
+        neighbors.byteswap()
+    with open(path, "wb") as f:
+        f.write(header)
+        start.tofile(f)
+        neighbors.tofile(f)
+
+
+def check(path, steps):
+    """Follow an encoder-like random walk through the cube with a NameTracker and compare to a full scan."""
+    if not color_utils.load_neighbor_graph(path):
+        sys.exit(f"could not load {path}")
+    tracker = color_utils.NameTracker()
+    rng = random.Random(1)
+    color = [128, 128, 128]
+    for step in range(steps):
+        channel = rng.randrange(3)
+        color[channel] = max(0, min(255, color[channel] + rng.choice((-9, -3, -1, 1, 3, 9))))
+        if step % 500 == 0:
+            color = [rng.randrange(256) for _ in range(3)]
+        got = tracker.nearest(*color)
+        expected = color_utils.linear_nearest(*color)
+        if got != expected:
+            sys.exit(f"tracker returned {got} instead of {expected} at {tuple(color)}")
+    print(f"checked {steps} steps: {tracker.distance_checks / tracker.lookups:.1f} distance checks per lookup, "
+          f"{tracker.fallbacks} full searches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bits", type=int, default=5, choices=range(1, 8),
+                        help="bits per channel of the cells used to find touching Voronoi cells")
+    parser.add_argument("--output", default=os.path.join(MAIN_DIR, color_utils.NEIGHBOR_GRAPH_FILE))
+    parser.add_argument("--check", type=int, default=20000, help="random walk steps to verify (0 to skip)")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    start, neighbors, distinct = build(args.bits)
+    write_graph(args.output, start, neighbors)
+    print(f"{distinct} distinct colors, {len(neighbors)} directed edges "
+          f"({len(neighbors) / distinct:.1f} neighbors each) -> {args.output} in {time.monotonic() - started:.1f}s")
+    if args.check:
+        check(args.output, args.check)
+
+
+if __name__ == "__main__":
+    main()
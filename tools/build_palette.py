@@ -0,0 +1,40 @@
+"""Compile main/named_colors.json into main/named_colors.bin, the packed palette
+color_utils loads at boot.
+
+named_colors.json stays the source of truth: edit it, then rerun this script,
+tools/build_neighbor_graph.py and tools/build_name_lut.py. The neighbor graph
+and the LUT are tied to the palette they were built from; color_utils ignores
+stale ones and falls back to slower searches.
+
+    python tools/build_palette.py [--input main/named_colors.json] [--output main/named_colors.bin]
+"""
+import argparse
+import os
+import sys
+
+CALLER_DIR = os.getcwd()
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+os.chdir(MAIN_DIR)
+
+import color_utils  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=os.path.join(MAIN_DIR, color_utils.NAMED_COLORS_JSON_FILE))
+    parser.add_argument("--output", default=os.path.join(MAIN_DIR, color_utils.NAMED_COLORS_FILE))
+    args = parser.parse_args()
+    # Relative paths are taken from where the script was run, not main/
+    args.input = os.path.join(CALLER_DIR, args.input)
+    args.output = os.path.join(CALLER_DIR, args.output)
+
+    color_utils.load_palette(args.input, lut_path=None)
+    color_utils.save_palette_binary(args.output)
+    print(f"{color_utils.palette_size()} colors, {len(color_utils.palette_names)} byte name table, "
+          f"{os.path.getsize(args.output)} bytes (was {os.path.getsize(args.input)}) -> {args.output}")
+    print("now rerun tools/build_neighbor_graph.py and tools/build_name_lut.py for this palette")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Check main/input_utils.py's EncoderAccelerator: slow turns step exactly 1:1.
+
+Sweeps of one knob at rates at or below slow_rate are replayed through
+EncoderInput and SimulatedEncoder under a VirtualClock, the way
+bench_encoder_replay.py drives them, and each detent must move the value
+by exactly `sensitivity`. The same holds after a fast spin in the same
+direction (no carried fraction leaks into the slow turn) and for a range
+of window / slow_rate settings. A fast spin must still be accelerated.
+Runs under CPython; only input_utils is imported from main/.
+
+    python tools/check_encoder_acceleration.py [--detents 30] [--sensitivity 3]
+"""
+import argparse
+import json
+import os
+import sys
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+
+from input_utils import (EVENT_ROTATE, EncoderAccelerator, EncoderInput,  # noqa: E402
+                         VirtualClock, knob_value, replay_trace, sweep_trace)
+
+ADDRESS = 0x36
+READ_RATE = 200  # encoder reads per virtual second, the device's task rate
+
+
+def turn(accelerator, rate, detents, sensitivity, clock=None):
+    """Replay `detents` detents at `rate` per second; return (value moved, detents read)."""
+    clock = clock or VirtualClock()
+    start = clock()
+    scripts = sweep_trace([ADDRESS], seconds=detents / rate, rate=rate, span=detents, press_every=0)
+    for script in scripts.values():
+        for i in range(len(script)):
+            script.times[i] += start // 1_000_000
+    encoder_input = EncoderInput(clock=clock)
+    players = replay_trace(encoder_input, scripts, clock)
+    value = 128
+    read = 0
+    while not all(player.finished() for player in players) or encoder_input.events:
+        encoder_input.update()
+        while encoder_input.events:
+            kind, source, delta, timestamp = encoder_input.events.pop()
+            if kind == EVENT_ROTATE:
+                read += delta
+                value = knob_value(value, accelerator.apply(delta, timestamp), sensitivity)
+        clock.advance(1 / READ_RATE)
+    return 128 - value, read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detents", type=int, default=30)
+    parser.add_argument("--sensitivity", type=int, default=3)
+    args = parser.parse_args()
+    with open(os.path.join(MAIN_DIR, "settings.json")) as f:
+        acceleration = json.load(f).get("encoder_acceleration", {})
+    failures = []
+    runs = 0
+
+    configs = [acceleration, {"window": 0.05, "slow_rate": 3}, {"window": 0.25, "slow_rate": 8},
+               {"window": 0.5, "slow_rate": 1}]
+    for config in configs:
+        window = config.get("window", 0.1)
+        slow_rate = config.get("slow_rate", 5)
+        for rate in (slow_rate / 4, slow_rate / 2, slow_rate * 0.9, slow_rate):
+            accelerator = EncoderAccelerator(window=window, slow_rate=slow_rate,
+                                             fast_rate=config.get("fast_rate", 40),
+                                             max_gain=config.get("max_gain", 6.0))
+            moved, read = turn(accelerator, rate, args.detents, args.sensitivity)
+            runs += 1
+            if moved != read * args.sensitivity:
+                failures.append(f"window {window} slow_rate {slow_rate}: {read} detents at {rate:g}/s "
+                                f"moved {moved}, not {read * args.sensitivity}")
+
+            # A fast spin first, then the same slow turn
+            clock = VirtualClock()
+            fast_moved, fast_read = turn(accelerator, 60, 40, 1, clock)
+            if fast_moved <= fast_read:
+                failures.append(f"window {window}: a spin at 60/s was not accelerated ({fast_moved} steps)")
+            clock.advance(1.0)
+            moved, read = turn(accelerator, rate, args.detents, args.sensitivity, clock)
+            runs += 1
+            if moved != read * args.sensitivity:
+                failures.append(f"window {window} slow_rate {slow_rate}: after a spin, {read} detents at "
+                                f"{rate:g}/s moved {moved}, not {read * args.sensitivity}")
+
+    for failure in failures[:20]:
+        print(f"FAIL: {failure}")
+    print(f"{runs} slow turns of {args.detents} detents at sensitivity {args.sensitivity}: {len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
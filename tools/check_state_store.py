@@ -0,0 +1,110 @@
+"""Check main/state_utils.py: record round trips, CRC rejection, slot rotation
+and sequence number rollover, against a bytearray standing in for NVM.
+
+Random menu states are packed and unpacked, then saved through a StateStore
+the way code.py drives it (touch on input, update from the state task). Each
+reload must return the newest state written, even after the newest slot is
+corrupted (the previous one wins) and across the 32-bit sequence wrap.
+Runs under CPython; only state_utils is imported from main/.
+
+    python tools/check_state_store.py [--states 500] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+
+import state_utils  # noqa: E402
+from state_utils import StateStore, pack_state, unpack_state  # noqa: E402
+
+SECOND = 1_000_000_000
+SLOTS = 8
+SLOT_SIZE = 64
+
+
+def random_state(rng):
+    state = {
+        "trail_delay": rng.choice((0.01, 0.05, 0.07, 0.1, 0.25)),
+        "knob_sensitivity": rng.randrange(1, 8),
+        "menu_index": rng.randrange(2),
+    }
+    for prefix in state_utils.CHANNEL_GROUPS:
+        for index in range(3):
+            value = rng.randrange(256)
+            state[f"{prefix}{index}"] = {"value": value, "encoder_position": value, "enabled": rng.random() < 0.8}
+    return state
+
+
+def check(condition, message, failures):
+    if not condition:
+        failures.append(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--states", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    failures = []
+
+    # Pack / unpack round trips
+    buf = bytearray(SLOT_SIZE)
+    for _ in range(args.states):
+        state = random_state(rng)
+        length = pack_state(state, buf)
+        check(unpack_state(buf[:length]) == state, f"round trip changed {state}", failures)
+
+    # Saving: idle and min_interval gating, rotation, reloading the newest
+    nvm = bytearray(b"\xff" * (SLOTS * SLOT_SIZE))
+    store = StateStore(nvm, SLOTS, SLOT_SIZE, idle=10, min_interval=60)
+    check(store.load() == {}, "erased storage did not load as empty", failures)
+    now = 0
+    state = random_state(rng)
+    store.touch(now)
+    check(not store.update(state, now + 5 * SECOND), "wrote before the knobs were idle", failures)
+    now += 11 * SECOND
+    check(store.update(state, now), "did not write once idle", failures)
+    check(not store.update(state, now + 120 * SECOND), "rewrote an unchanged state", failures)
+    state = random_state(rng)
+    check(not store.update(state, now + 30 * SECOND), "wrote again within min_interval", failures)
+    history = []
+    for _ in range(args.states):
+        now += 61 * SECOND
+        state = random_state(rng)
+        if store.update(state, now):
+            history.append(state)
+        reloaded = StateStore(nvm, SLOTS, SLOT_SIZE).load()
+        check(reloaded == state, "reload did not return the newest state", failures)
+    check(len(history) == args.states, f"only {len(history)} of {args.states} changed states written", failures)
+
+    # A torn or corrupted newest slot falls back to the previous one
+    newest = (store.next_slot - 1) % SLOTS
+    nvm[newest * SLOT_SIZE + 12] ^= 0x5A
+    reloaded = StateStore(nvm, SLOTS, SLOT_SIZE).load()
+    check(reloaded == history[-2], "corrupted newest slot was not skipped", failures)
+
+    # Sequence numbers wrap around 2**32 without the old slots looking newer
+    nvm = bytearray(b"\xff" * (SLOTS * SLOT_SIZE))
+    store = StateStore(nvm, SLOTS, SLOT_SIZE, idle=0, min_interval=0)
+    store.sequence = 0xFFFFFFFF - 3
+    store.touch(0)
+    for step in range(1, 2 * SLOTS + 1):
+        state = random_state(rng)
+        check(store.update(state, step * SECOND), f"did not write after sequence {store.sequence:#x}", failures)
+        reloaded_store = StateStore(nvm, SLOTS, SLOT_SIZE)
+        check(reloaded_store.load() == state, f"wrong state after sequence {store.sequence:#x}", failures)
+        check(reloaded_store.sequence == store.sequence, "reload picked the wrong sequence number", failures)
+
+    for failure in failures[:20]:
+        print(f"FAIL: {failure}")
+    print(f"{args.states} round trips, {len(history)} rotating saves, rollover through {store.sequence:#x}: "
+          f"{len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Classify the RGB cube against the palette and save the labels as a .npy volume.
+
+Replaces text dumps like output.txt: every sampled (r, g, b) gets the palette
+index of its closest color (the same answer closest_named_color gives for a
+single name), written into a memory-mapped uint8/uint16 array of shape
+(n, n, n) indexed [r // stride, g // stride, b // stride].
+
+Work is split into slabs of red values spread over a process pool. Each slab
+is classified with NumPy broadcasting in chunks of --chunk colors, so memory
+stays bounded at roughly chunk x palette size x 4 bytes per worker. Requires
+NumPy (CPython only).
+
+    python tools/classify_cube.py [--stride 1] [--output cube_labels.npy] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CALLER_DIR = os.getcwd()
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+os.chdir(MAIN_DIR)
+
+import color_utils  # noqa: E402
+
+# Set in each worker by init_worker
+_volume = None
+_palette = None
+_palette_sq = None
+_values = None
+_chunk = None
+
+
+def palette_array():
+    return np.frombuffer(bytes(color_utils.palette_rgb), dtype=np.uint8).reshape(-1, 3)
+
+
+def init_worker(path, chunk):
+    global _volume, _palette, _palette_sq, _values, _chunk
+    palette = palette_array().astype(np.float32)
+    _volume = np.load(path, mmap_mode="r+")
+    _palette = palette
+    _palette_sq = (palette * palette).sum(axis=1)
+    _values = np.arange(0, 256, 256 // _volume.shape[0], dtype=np.float32)
+    _chunk = chunk
+
+
+def classify_points(points):
+    """Return the index of the closest palette color for each row of points (float32, N x 3).
+
+    Squared distances are expanded as |p|^2 - 2 p.c + |c|^2. Every term is an
+    integer below 2 ** 24, so float32 keeps them exact and argmin picks the
+    lowest index on ties, matching the name-ordered palette.
+    """
+    dist = (points * points).sum(axis=1)[:, None] - 2.0 * (points @ _palette.T) + _palette_sq[None, :]
+    return dist.argmin(axis=1)
+
+
+def classify_slab(r_lo, r_hi):
+    n = _values.shape[0]
+    g, b = np.meshgrid(_values, _values, indexing="ij")
+    gb = np.stack((g.ravel(), b.ravel()), axis=1)
+    rows_per_chunk = max(1, _chunk // (n * n))
+    for r0 in range(r_lo, r_hi, rows_per_chunk):
+        r1 = min(r_hi, r0 + rows_per_chunk)
+        if n * n <= _chunk:
+            reds = np.repeat(_values[r0:r1], n * n)
+            points = np.column_stack((reds, np.tile(gb, (r1 - r0, 1))))
+            _volume[r0:r1] = classify_points(points).reshape(r1 - r0, n, n)
+        else:
+            for k in range(r0, r1):
+                plane = _volume[k].reshape(-1)
+                for start in range(0, n * n, _chunk):
+                    part = gb[start:start + _chunk]
+                    points = np.column_stack((np.full(len(part), _values[k], dtype=np.float32), part))
+                    plane[start:start + len(part)] = classify_points(points)
+    _volume.flush()
+    return (r_hi - r_lo) * n * n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stride", type=int, default=1, choices=(1, 2, 4, 8, 16, 32, 64, 128),
+                        help="sample every Nth value per channel (1 = full 256^3 cube)")
+    parser.add_argument("--output", default="cube_labels.npy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=1 << 16, help="colors classified per NumPy step")
+    parser.add_argument("--palette", default=None, help="palette file (.bin or .json), default is the device palette")
+    args = parser.parse_args()
+
+    if args.palette:
+        color_utils.load_palette(os.path.join(CALLER_DIR, args.palette), lut_path=None)
+    output = os.path.join(CALLER_DIR, args.output)
+    n = 256 // args.stride
+    dtype = np.uint8 if color_utils.palette_size() <= 256 else np.uint16
+    np.lib.format.open_memmap(output, mode="w+", dtype=dtype, shape=(n, n, n)).flush()
+
+    slab = max(1, n // (4 * args.workers))
+    slabs = [(lo, min(n, lo + slab)) for lo in range(0, n, slab)]
+    started = time.monotonic()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(output, args.chunk)) as pool:
+        done = sum(pool.map(classify_slab, *zip(*slabs)))
+    elapsed = time.monotonic() - started
+
+    print(f"classified {done} colors against {color_utils.palette_size()} palette entries "
+          f"in {elapsed:.2f}s ({done / elapsed / 1e6:.1f} M colors/s, {args.workers} workers) -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Check main/named_colors.lut against a brute force search of the palette.
+
+Every sampled color is named through the LUT (with and without exact
+refinement) and through a full sort of the palette, the way
+closest_named_color originally worked. Exact lookups must match everywhere;
+the approximate mismatch rate is reported for reference.
+
+With --labels, the reference answers come from a label volume written by
+tools/classify_cube.py instead, and every color in that volume is checked.
+
+    python tools/verify_name_lut.py [--stride 5] [--lut main/named_colors.lut] [--labels cube_labels.npy]
+"""
+import argparse
+import os
+import sys
+import time
+
+CALLER_DIR = os.getcwd()
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+os.chdir(MAIN_DIR)
+
+import color_utils  # noqa: E402
+
+
+def brute_force_name(palette, r, g, b):
+    return sorted(
+        ((r - pr) ** 2 + (g - pg) ** 2 + (b - pb) ** 2, name)
+        for name, pr, pg, pb in palette
+    )[0][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stride", type=int, default=5, help="sample every Nth value per channel (1 = full cube)")
+    parser.add_argument("--lut", default=os.path.join(MAIN_DIR, color_utils.NAME_LUT_FILE))
+    parser.add_argument("--labels", default=None, help="label volume from tools/classify_cube.py to check against")
+    args = parser.parse_args()
+
+    if not color_utils.load_name_lut(os.path.join(CALLER_DIR, args.lut)):
+        sys.exit(f"could not load {args.lut}")
+
+    rgb = color_utils.palette_rgb
+    names = [color_utils.palette_name(i) for i in range(color_utils.palette_size())]
+    palette = [(names[i], rgb[3 * i], rgb[3 * i + 1], rgb[3 * i + 2]) for i in range(len(names))]
+    lookup = color_utils.lut_color_index
+    if args.labels:
+        import numpy as np
+        labels = np.load(os.path.join(CALLER_DIR, args.labels), mmap_mode="r")
+        label_stride = 256 // labels.shape[0]
+        values = list(range(0, 256, label_stride))
+
+        def expected_name(r, g, b):
+            return names[labels[r // label_stride, g // label_stride, b // label_stride]]
+    else:
+        values = list(range(0, 256, args.stride))
+        if values[-1] != 255:
+            values.append(255)
+
+        def expected_name(r, g, b):
+            return brute_force_name(palette, r, g, b)
+
+    started = time.monotonic()
+    checked = exact_mismatches = approx_mismatches = 0
+    for r in values:
+        for g in values:
+            for b in values:
+                expected = expected_name(r, g, b)
+                checked += 1
+                if names[lookup(r, g, b, True)] != expected:
+                    exact_mismatches += 1
+                    if exact_mismatches <= 10:
+                        print(f"mismatch at ({r}, {g}, {b}): lut={names[lookup(r, g, b, True)]} expected={expected}")
+                if names[lookup(r, g, b, False)] != expected:
+                    approx_mismatches += 1
+
+    print(f"checked {checked} colors in {time.monotonic() - started:.1f}s")
+    print(f"exact:  {exact_mismatches} mismatches")
+    print(f"approx: {approx_mismatches} mismatches ({100.0 * approx_mismatches / checked:.2f}%)")
+    sys.exit(1 if exact_mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()